@@ -0,0 +1,62 @@
+# benchmarks/bench_chunker.py
+"""
+Chunking scaling benchmark.
+Times chunk_file on synthetic Python modules of growing size; time per line
+should stay flat if chunking is linear in file size.
+
+Usage: python benchmarks/bench_chunker.py [max_lines]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chunker import chunk_file
+from src.ingest import calculate_hash
+from src.models import CodeFile
+
+def make_module(target_lines: int, methods_per_class: int = 8) -> str:
+    """Builds a module of small classes and functions, like generated code."""
+    lines = ["import os", "import sys", "from typing import List", ""]
+    i = 0
+    while len(lines) < target_lines:
+        lines.append(f"class Generated{i}:")
+        for m in range(methods_per_class):
+            lines.append(f"    def method_{m}(self, value):")
+            lines.append(f"        return value + {m}")
+            lines.append("")
+        lines.append(f"def helper_{i}(x):")
+        lines.append(f"    return Generated{i}().method_0(x)")
+        lines.append("")
+        i += 1
+    return "\n".join(lines)
+
+def bench(target_lines: int, repeat: int = 3) -> dict:
+    content = make_module(target_lines)
+    file = CodeFile(
+        file_path="generated.py",
+        language="python",
+        content=content,
+        file_hash=calculate_hash(content),
+        loc=len(content.splitlines())
+    )
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = chunk_file(file)
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        "lines": file.loc,
+        "chunks": len(chunks),
+        "seconds": round(best, 4),
+        "us_per_line": round(best / file.loc * 1e6, 3)
+    }
+
+if __name__ == "__main__":
+    max_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    sizes = [max_lines // 8, max_lines // 4, max_lines // 2, max_lines]
+    print(json.dumps({"benchmark": "chunker_scaling", "results": [bench(n) for n in sizes]}, indent=2))
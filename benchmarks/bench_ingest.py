@@ -0,0 +1,180 @@
+# benchmarks/bench_ingest.py
+"""
+End-to-end benchmark of the ingest and search paths.
+Generates a synthetic repository, starts the fake model server in-process
+and times each stage separately:
+
+  scan      scan_repository (latencies: load_file per file)
+  chunk     chunk_file per file
+  index     RepoCollection.add_chunks per batch of chunks
+  write     inject_docstrings per file
+  search    VectorStore.search per query
+
+Prints one JSON document with throughput, p50/p99 latency and peak RSS per
+stage. Save it with --output and diff runs across commits.
+
+Usage: python benchmarks/bench_ingest.py --files 200 --defs-per-file 10 --latency 0.02
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Iterable, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_model_server import FakeModelConfig, start_fake_server
+from synthetic_repo import generate_repo
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of latencies."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def time_each(fn: Callable, items: Iterable, unit: str, count: Callable = lambda item, result: 1):
+    """
+    Runs fn over items, returning results plus a stage report. Latencies are
+    per call; throughput counts `unit`s, which count() derives from each call.
+    """
+    latencies, results, processed = [], [], 0
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        result = fn(item)
+        latencies.append(time.perf_counter() - t0)
+        processed += count(item, result)
+        results.append(result)
+    return results, report(time.perf_counter() - start, processed, latencies, unit)
+
+def report(elapsed: float, processed: int, latencies: List[float], unit: str) -> dict:
+    return {
+        "unit": unit,
+        "items": processed,
+        "seconds": round(elapsed, 4),
+        "items_per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args) -> dict:
+    from src import ai_engine
+    from src.chunker import chunk_file
+    from src.ingest import scan_repository, iter_source_paths, load_file
+    from src.vector_store import VectorStore
+    from src.writer import inject_docstrings
+
+    config = FakeModelConfig(args.latency, args.embed_latency, dim=args.dim)
+    server, base_url = start_fake_server(config)
+    ai_engine.API_BASE_URL = base_url
+    # Every run should pay for model calls, not read them from a previous run
+    ai_engine.CACHE_ENABLED = args.model_cache
+
+    workdir = tempfile.mkdtemp(prefix="docgen_bench_")
+    repo_path = os.path.join(workdir, "repo")
+    stages = {}
+    try:
+        lines = generate_repo(repo_path, args.files, args.defs_per_file, args.depth, seed=args.seed)
+
+        # The code under test prints progress per item; keep it out of the JSON
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            files = scan_repository(repo_path)
+            scan_seconds = time.perf_counter() - start
+            _, stages["scan"] = time_each(lambda paths: load_file(*paths), list(iter_source_paths(repo_path)), "files")
+            stages["scan"].update(seconds=round(scan_seconds, 4),
+                                  items_per_second=round(len(files) / scan_seconds, 2) if scan_seconds else 0.0)
+
+            per_file, stages["chunk"] = time_each(chunk_file, files, "chunks", count=lambda file, chunks: len(chunks))
+            chunks = [chunk for file_chunks in per_file for chunk in file_chunks]
+
+            store = VectorStore(os.path.join(workdir, "chroma_db"))
+            namespace = store.repo("bench")
+            batches = [chunks[i:i + args.batch_size] for i in range(0, len(chunks), args.batch_size)]
+            _, stages["index"] = time_each(namespace.add_chunks, batches, "chunks", count=lambda batch, _: len(batch))
+            namespace.flush()
+
+            entries = [(os.path.join(repo_path, file.file_path), file_chunks)
+                       for file, file_chunks in zip(files, per_file)]
+            _, stages["write"] = time_each(lambda entry: inject_docstrings(*entry), entries, "files")
+
+            # Half exact symbol lookups, half free-text questions
+            queries = []
+            for i in range(args.queries):
+                chunk = chunks[(i * 7919) % len(chunks)]
+                queries.append(chunk.chunk_id if i % 2 == 0 else f"what does {chunk.chunk_id} return {i}")
+            _, stages["search"] = time_each(store.search, queries, "queries")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "benchmark": "ingest_search",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "files": args.files,
+            "defs_per_file": args.defs_per_file,
+            "depth": args.depth,
+            "lines": lines,
+            "chunks": len(chunks),
+            "batch_size": args.batch_size,
+            "queries": args.queries,
+            "latency": args.latency,
+            "embed_latency": args.embed_latency,
+            "model_cache": args.model_cache,
+            "seed": args.seed
+        },
+        "model_requests": dict(config.requests),
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--defs-per-file", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=1, help="class nesting depth")
+    parser.add_argument("--batch-size", type=int, default=64, help="chunks per add_chunks call")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake server seconds per chat completion")
+    parser.add_argument("--embed-latency", type=float, default=0.005, help="fake server seconds per embeddings request")
+    parser.add_argument("--dim", type=int, default=256, help="embedding dimension")
+    parser.add_argument("--model-cache", action="store_true", help="keep the on-disk model cache enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = json.dumps(run(args), indent=2)
+    print(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(result + "\n")
@@ -0,0 +1,82 @@
+# benchmarks/bench_languages.py
+"""
+Chunking throughput per language.
+Generates one synthetic repository per language with the same shape and
+measures:
+
+  chunk_file     chunk_file per file in this process (p50/p99 per file)
+  scan_and_chunk the ingest path: read, hash and chunk across the process pool
+
+Prints files/s and chunks/s for each. Every language's repository has the
+same classes, methods and functions as the Python one (Java adds one outer
+class per file), so a lexer regression shows up as "chunks_ok": false.
+
+Usage: python benchmarks/bench_languages.py --files 500 --defs-per-file 10
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_ingest import report, time_each
+from synthetic_repo import EXTENSIONS, generate_repo
+
+def bench_language(language: str, workdir: str, args, expected: int = None) -> dict:
+    from src.chunker import chunk_file
+    from src.ingest import scan_and_chunk, scan_repository
+
+    repo = os.path.join(workdir, language)
+    lines = generate_repo(repo, args.files, args.defs_per_file, depth=1, seed=args.seed, language=language)
+    files = scan_repository(repo)
+
+    results, per_file = time_each(chunk_file, files, "files")
+    chunks = sum(len(chunks) for chunks in results)
+
+    start = time.perf_counter()
+    pooled = sum(len(chunks) for _, chunks in scan_and_chunk(repo, max_workers=args.workers))
+    elapsed = time.perf_counter() - start
+    pool = report(elapsed, len(files), [], "files")
+    pool["chunks_per_second"] = round(pooled / elapsed, 2) if elapsed else 0.0
+
+    if expected is not None and language == "java":
+        expected += len(files)
+    return {
+        "files": len(files),
+        "lines": lines,
+        "chunks": chunks,
+        "chunks_ok": chunks == pooled and expected in (None, chunks),
+        "chunk_file": per_file,
+        "scan_and_chunk": pool
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--defs-per-file", type=int, default=10)
+    parser.add_argument("--languages", default=",".join(sorted(EXTENSIONS)))
+    parser.add_argument("--workers", type=int, default=None, help="scan_and_chunk processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="docgen_bench_")
+    try:
+        # Python first: its ast chunks are the reference count for the lexers
+        results = {"python": bench_language("python", workdir, args)}
+        for language in args.languages.split(","):
+            if language != "python":
+                results[language] = bench_language(language, workdir, args, results["python"]["chunks"])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({
+        "benchmark": "chunking_by_language",
+        "config": {"files": args.files, "defs_per_file": args.defs_per_file, "workers": args.workers},
+        "results": results
+    }, indent=2))
@@ -0,0 +1,90 @@
+# benchmarks/bench_memory.py
+"""
+Memory and speed of the in-memory chunk representation.
+Generates a synthetic repository, chunks every file and keeps only the
+chunks (as the pipeline does while files are in flight), then reports:
+
+  retained_mb        traced memory held by the chunks after chunking
+  bytes_per_chunk    the same, per chunk
+  peak_mb            traced peak while chunking
+  chunk              chunk_file throughput and per-file latency
+  pickled_mb         size of the chunks as sent back from scan workers
+  access_seconds     reading code/imports of every chunk once (prompt building)
+
+Run it on two commits and compare.
+
+Usage: python benchmarks/bench_memory.py --files 2000 --defs-per-file 10
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_ingest import peak_rss_mb, time_each
+from synthetic_repo import generate_repo
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--defs-per-file", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=2, help="class nesting depth")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from src.chunker import chunk_file
+    from src.ingest import iter_source_paths, load_file
+
+    workdir = tempfile.mkdtemp(prefix="docgen_bench_")
+    try:
+        lines = generate_repo(workdir, args.files, args.defs_per_file, args.depth, seed=args.seed)
+        paths = list(iter_source_paths(workdir))
+
+        # Timing without tracemalloc, which slows allocation-heavy code down
+        files = [load_file(full_path, rel_path) for full_path, rel_path in paths]
+        _, chunk_report = time_each(chunk_file, files, "chunks", count=lambda file, chunks: len(chunks))
+        del files
+        gc.collect()
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        chunks_by_file = []
+        for full_path, rel_path in paths:
+            # The file object itself is dropped; whatever the chunks keep is what counts
+            chunks_by_file.append(chunk_file(load_file(full_path, rel_path)))
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        chunks = [chunk for file_chunks in chunks_by_file for chunk in file_chunks]
+        pickled = sum(len(pickle.dumps(file_chunks)) for file_chunks in chunks_by_file)
+
+        start = time.perf_counter()
+        touched = sum(len(chunk.code) + len(chunk.imports) for chunk in chunks)
+        access_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({
+        "benchmark": "chunk_memory",
+        "config": {"files": args.files, "defs_per_file": args.defs_per_file, "depth": args.depth, "lines": lines},
+        "results": {
+            "chunks": len(chunks),
+            "retained_mb": round((retained - before) / 2 ** 20, 2),
+            "bytes_per_chunk": round((retained - before) / len(chunks)),
+            "peak_mb": round((peak - before) / 2 ** 20, 2),
+            "pickled_mb": round(pickled / 2 ** 20, 2),
+            "access_seconds": round(access_seconds, 4),
+            "chunk": chunk_report,
+            "peak_rss_mb": peak_rss_mb()
+        }
+    }, indent=2))
@@ -0,0 +1,94 @@
+# benchmarks/bench_packing.py
+"""
+Summarization cost with and without chunk packing.
+Chunks a synthetic repository and summarizes every chunk twice against the
+fake model server: once one prompt per chunk with whole class bodies (the
+old behaviour), once with small siblings packed and classes sent as
+skeletons. Reports LLM requests, prompt/completion tokens (the fake server
+estimates ~4 chars per token) and wall time, plus the reduction.
+
+Usage: python benchmarks/bench_packing.py --files 50 --defs-per-file 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_model_server import FakeModelConfig, start_fake_server
+from synthetic_repo import generate_repo
+
+def summarize_all(chunks, config: FakeModelConfig, packed: bool) -> dict:
+    from src import ai_engine, packing
+
+    packing.PACK_ENABLED = packed
+    packing.CLASS_SKELETONS = packed
+
+    before = dict(config.requests)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        summaries = [summary for _, summary in ai_engine.summarize_chunks(chunks)]
+    elapsed = time.perf_counter() - start
+
+    used = {key: config.requests[key] - before[key] for key in before}
+    return {
+        "requests": used["chat"],
+        "prompt_tokens": used["prompt_tokens"],
+        "completion_tokens": used["completion_tokens"],
+        "seconds": round(elapsed, 3),
+        "failed": summaries.count("Summary generation failed.")
+    }
+
+def reduction(before: float, after: float) -> float:
+    return round(100.0 * (before - after) / before, 1) if before else 0.0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--defs-per-file", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=1, help="class nesting depth")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake server seconds per chat completion")
+    parser.add_argument("--seed", type=int, default=0)
+    ARGS = parser.parse_args()
+
+    from src import ai_engine
+    from src.chunker import chunk_file
+    from src.ingest import scan_repository
+
+    # Both runs must pay for every summary
+    ai_engine.CACHE_ENABLED = False
+
+    workdir = tempfile.mkdtemp(prefix="docgen_bench_")
+    try:
+        generate_repo(workdir, ARGS.files, ARGS.defs_per_file, ARGS.depth, seed=ARGS.seed)
+        chunks = [chunk for file in scan_repository(workdir) for chunk in chunk_file(file)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    config = FakeModelConfig(latency=ARGS.latency)
+    server, ai_engine.API_BASE_URL = start_fake_server(config)
+    try:
+        baseline = summarize_all(chunks, config, packed=False)
+        packed = summarize_all(chunks, config, packed=True)
+    finally:
+        server.shutdown()
+
+    print(json.dumps({
+        "benchmark": "summary_packing",
+        "config": {"files": ARGS.files, "defs_per_file": ARGS.defs_per_file, "depth": ARGS.depth,
+                   "chunks": len(chunks), "latency": ARGS.latency, "seed": ARGS.seed},
+        "one_per_chunk": baseline,
+        "packed": packed,
+        "reduction_percent": {
+            key: reduction(baseline[key], packed[key])
+            for key in ("requests", "prompt_tokens", "completion_tokens", "seconds")
+        }
+    }, indent=2))
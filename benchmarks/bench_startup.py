@@ -0,0 +1,111 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start budget check for the server and the CLI.
+Runs each target in fresh interpreters and reports the median time spent
+importing/starting it (interpreter startup excluded), plus the heavy
+modules it pulled in:
+
+  server_import   import src.server (what an autoscaled pod pays before serving)
+  server_ready    import + the app's lifespan startup (opens the vector store)
+  pipeline_import import src.pipeline
+  cli_scan        main.py --scan on a small repository (pre-commit hook path)
+
+Exits with status 1 if a target is over budget or loads a module it must
+not: python benchmarks/bench_startup.py --runs 5
+Use --scale on slow machines to stretch every budget. tests/test_startup.py
+runs the same checks under pytest.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_repo import generate_repo
+
+HEAVY_MODULES = ["chromadb", "numpy", "requests", "fastapi", "pydantic", "multiprocessing"]
+
+# name -> (code to time, budget in ms, modules it must not import)
+TARGETS = {
+    "server_import": ("import src.server", 600, ["chromadb", "numpy", "requests"]),
+    "server_ready": (
+        "import asyncio, src.server as server\n"
+        "async def startup():\n"
+        "    async with server.lifespan(server.app):\n"
+        "        pass\n"
+        "asyncio.run(startup())",
+        2500, ["requests"]
+    ),
+    "pipeline_import": ("import src.pipeline", 100, ["chromadb", "numpy", "requests", "fastapi", "pydantic"]),
+    "cli_scan": (
+        "import main\n"
+        "sys.argv = ['main.py', '--scan', {repo!r}, '--manifest', {manifest!r}]\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    main.main()",
+        150, ["chromadb", "numpy", "requests", "fastapi", "pydantic"]
+    ),
+}
+
+RUNNER = """
+import contextlib, io, json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def run_once(code: str, cwd: str) -> dict:
+    script = RUNNER.format(root=ROOT_DIR, code=code, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - start
+    return result
+
+def check(name: str, runs: int, scale: float, workdir: str) -> dict:
+    code, budget_ms, forbidden = TARGETS[name]
+    code = code.format(repo=os.path.join(workdir, "repo"), manifest=os.path.join(workdir, "manifest.json"))
+    results = [run_once(code, workdir) for _ in range(runs)]
+
+    median_ms = statistics.median(r["seconds"] for r in results) * 1000
+    loaded = results[-1]["modules"]
+    problems = []
+    if median_ms > budget_ms * scale:
+        problems.append(f"{median_ms:.0f}ms over the {budget_ms * scale:.0f}ms budget")
+    problems += [f"imports {module}" for module in forbidden if module in loaded]
+    return {
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(min(r["seconds"] for r in results) * 1000, 1),
+        "process_ms": round(statistics.median(r["process_seconds"] for r in results) * 1000, 1),
+        "budget_ms": round(budget_ms * scale),
+        "heavy_modules": loaded,
+        "ok": not problems,
+        "problems": problems
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    args = parser.parse_args()
+
+    # Scratch working directory: the server's default store path is relative
+    workdir = tempfile.mkdtemp(prefix="docgen_bench_")
+    try:
+        generate_repo(os.path.join(workdir, "repo"), files=20, defs_per_file=10)
+        results = {name: check(name, args.runs, args.scale, workdir) for name in args.targets.split(",")}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({"benchmark": "startup_budget", "config": vars(args), "results": results}, indent=2))
+    sys.exit(0 if all(r["ok"] for r in results.values()) else 1)
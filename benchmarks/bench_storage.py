@@ -0,0 +1,146 @@
+# benchmarks/bench_storage.py
+"""
+Storage backend comparison: Chroma vs the memory-mapped NumPy index.
+Fills one repository namespace per backend with random unit vectors, then
+measures:
+
+  cold_start_ms   fresh process: import, open the collection, answer one query
+  query p50/p99   top-k over the whole repo and with a path-prefix filter
+  readers         read-only processes querying the memmap index at once
+
+Also reports the overlap of each backend's top-k with exact search
+(Chroma's HNSW is approximate, the memmap index is exact).
+
+Usage: python benchmarks/bench_storage.py --vectors 100000 --dim 384
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_ingest import percentile
+
+import numpy as np
+
+REPO = "bench"
+
+def random_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def fill(backend: str, path: str, vectors: np.ndarray, batch: int = 5000) -> float:
+    from src.storage import create_backend
+
+    collection = create_backend(backend, path).open_collection(REPO)
+    start = time.perf_counter()
+    for begin in range(0, len(vectors), batch):
+        ids = [f"{REPO}:pkg{i % 10}/m{i}.py:f{i}" for i in range(begin, min(begin + batch, len(vectors)))]
+        collection.upsert(
+            ids=ids,
+            embeddings=vectors[begin:begin + batch].tolist(),
+            documents=[f"def f{i}(): pass" for i in range(begin, begin + len(ids))],
+            metadatas=[{"repo": REPO, "type": "function", "path_0": f"pkg{i % 10}"} for i in range(begin, begin + len(ids))]
+        )
+    collection.flush()
+    return time.perf_counter() - start
+
+# Run in a fresh interpreter so import and open costs are included
+COLD_START = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.storage import create_backend
+collection = create_backend({backend!r}, {path!r}, read_only={read_only!r}).open_collection({repo!r})
+query = [0.0] * {dim}
+query[0] = 1.0
+latencies = []
+for i in range({queries}):
+    t0 = time.perf_counter()
+    collection.query(query, 10)
+    latencies.append(time.perf_counter() - t0)
+print(json.dumps({{"total": time.perf_counter() - start, "latencies": latencies}}))
+"""
+
+def run_process(backend: str, path: str, dim: int, queries: int = 1, read_only: bool = False) -> subprocess.Popen:
+    code = COLD_START.format(root=ROOT_DIR, path=path, backend=backend, read_only=read_only,
+                             repo=REPO, dim=dim, queries=queries)
+    return subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+
+def result_of(process: subprocess.Popen) -> dict:
+    out, _ = process.communicate()
+    return json.loads(out.strip().splitlines()[-1])
+
+def bench_backend(backend: str, path: str, vectors: np.ndarray, queries: np.ndarray, k: int) -> dict:
+    from src.storage import create_backend
+
+    fill_seconds = fill(backend, path, vectors)
+    cold = [result_of(run_process(backend, path, vectors.shape[1]))["total"] for _ in range(3)]
+
+    collection = create_backend(backend, path).open_collection(REPO)
+    report = {"fill_seconds": round(fill_seconds, 2), "cold_start_ms": round(min(cold) * 1000, 1)}
+    exact = np.argsort(-(vectors @ queries.T), axis=0)[:k].T
+
+    for label, where in (("query", None), ("query_filtered", {"path_0": "pkg3"})):
+        latencies, overlap = [], []
+        for q, truth in zip(queries, exact):
+            t0 = time.perf_counter()
+            found = collection.query(q.tolist(), k, where=where)
+            latencies.append(time.perf_counter() - t0)
+            if where is None:
+                rows = {int(doc_id.rsplit(":f", 1)[1]) for doc_id in found["ids"]}
+                overlap.append(len(rows & set(truth.tolist())) / k)
+        report[label] = {
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+        }
+        if overlap:
+            report[label]["recall_at_k"] = round(sum(overlap) / len(overlap), 3)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--readers", type=int, default=4, help="read-only memmap processes querying at once")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = random_vectors(args.vectors, args.dim, args.seed)
+    queries = random_vectors(args.queries, args.dim, args.seed + 1)
+
+    workdir = tempfile.mkdtemp(prefix="docgen_bench_")
+    results = {}
+    try:
+        for backend in ("chroma", "memmap"):
+            results[backend] = bench_backend(backend, os.path.join(workdir, backend), vectors, queries, args.k)
+
+        # Several processes sharing one index read-only
+        start = time.perf_counter()
+        readers = [run_process("memmap", os.path.join(workdir, "memmap"), args.dim, queries=args.queries, read_only=True)
+                   for _ in range(args.readers)]
+        latencies = [latency for process in readers for latency in result_of(process)["latencies"]]
+        results["memmap"]["shared_readers"] = {
+            "processes": args.readers,
+            "seconds": round(time.perf_counter() - start, 3),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({
+        "benchmark": "storage_backends",
+        "config": {"vectors": args.vectors, "dim": args.dim, "queries": args.queries, "k": args.k},
+        "results": results
+    }, indent=2))
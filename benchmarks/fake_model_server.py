@@ -0,0 +1,173 @@
+# benchmarks/fake_model_server.py
+"""
+Local stand-in for an OpenAI-compatible model server (Ollama's /v1 API).
+Serves /v1/chat/completions (plain or streamed as server-sent events) and
+/v1/embeddings with configurable latency and failure rate, so ingest/search
+can be exercised without a GPU. fail_next and fail_next_embeddings script
+exact failures for the tests.
+
+Usage: python benchmarks/fake_model_server.py --port 11435 --latency 0.05
+Then point src.ai_engine.API_BASE_URL at http://127.0.0.1:11435/v1
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+class FakeModelConfig:
+    def __init__(self, latency: float = 0.0, embed_latency: float = 0.0,
+                 fail_rate: float = 0.0, dim: int = 64, token_latency: float = 0.0,
+                 fail_next: Optional[List[int]] = None, fail_next_embeddings: Optional[List[int]] = None):
+        # latency is spent before the first token; streamed replies then
+        # take token_latency per word, so a full reply takes the sum
+        self.latency = latency
+        self.token_latency = token_latency
+        self.embed_latency = embed_latency
+        self.fail_rate = fail_rate
+        # HTTP statuses to answer the next requests with, in order, before fail_rate applies
+        self.fail_next = list(fail_next or [])
+        # The same, for /embeddings requests only
+        self.fail_next_embeddings = list(fail_next_embeddings or [])
+        self.dim = dim
+        self.requests = {"chat": 0, "embeddings": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.lock = threading.Lock()
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic pseudo-embedding derived from the text hash."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+def fake_summary(prompt: str) -> str:
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    return f"Handles one well-defined responsibility of the module (ref {digest})."
+
+def fake_answer(prompt: str) -> str:
+    """A few sentences citing the first excerpt, long enough to stream visibly."""
+    return " ".join([fake_summary(prompt)] * 3) + " See [1]."
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    config: FakeModelConfig = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, content: str, usage: dict):
+        """Streams content word by word as OpenAI-style SSE chunks, then usage and [DONE]."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(data: str):
+            event = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+            self.wfile.flush()
+
+        for i, word in enumerate(re.findall(r"\S+\s*", content)):
+            if i:
+                time.sleep(self.config.token_latency)
+            send_event(json.dumps({"choices": [{"index": 0, "delta": {"content": word}}]}))
+        send_event(json.dumps({"choices": [], "usage": usage}))
+        send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        config = self.config
+
+        with config.lock:
+            status = config.fail_next.pop(0) if config.fail_next else None
+            if status is None and self.path.endswith("/embeddings") and config.fail_next_embeddings:
+                status = config.fail_next_embeddings.pop(0)
+        if status is None and random.random() < config.fail_rate:
+            status = 500
+        if status is not None:
+            with config.lock:
+                config.requests["failed"] += 1
+            self._send_json(status, {"error": "injected failure"})
+            return
+
+        if self.path.endswith("/chat/completions"):
+            with config.lock:
+                config.requests["chat"] += 1
+            time.sleep(config.latency)
+            prompt = payload["messages"][-1]["content"]
+            if payload.get("response_format", {}).get("type") == "json_object":
+                # Packed prompt: one summary per "### name" section
+                names = re.findall(r"^\s*### (.+?)\s*$", prompt, re.MULTILINE)
+                content = json.dumps({name: fake_summary(name + prompt) for name in names})
+            elif payload.get("stream"):
+                content = fake_answer(prompt)
+            else:
+                content = fake_summary(prompt)
+            with config.lock:
+                config.requests["prompt_tokens"] += len(prompt) // 4
+                config.requests["completion_tokens"] += len(content) // 4
+            usage = {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4
+            }
+            if payload.get("stream"):
+                self._send_stream(content, usage)
+                return
+            self._send_json(200, {
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                "usage": usage
+            })
+        elif self.path.endswith("/embeddings"):
+            with config.lock:
+                config.requests["embeddings"] += 1
+            time.sleep(config.embed_latency)
+            inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+            self._send_json(200, {
+                "data": [{"index": i, "embedding": fake_embedding(text, config.dim)} for i, text in enumerate(inputs)]
+            })
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+def start_fake_server(config: FakeModelConfig, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Starts the server on a background thread; returns it and its /v1 base URL."""
+    handler = type("ConfiguredFakeModelHandler", (FakeModelHandler,), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per chat completion (to the first token when streaming)")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds per streamed word")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="seconds per embeddings request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--dim", type=int, default=64, help="embedding dimension")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(
+        FakeModelConfig(args.latency, args.embed_latency, args.fail_rate, args.dim, args.token_latency), port=args.port
+    )
+    print(f"Fake model server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
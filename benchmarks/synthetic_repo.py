@@ -0,0 +1,135 @@
+# benchmarks/synthetic_repo.py
+"""
+Generates synthetic repositories for benchmarks (Python by default, or
+JavaScript, TypeScript, Java or Go with --language).
+Output is deterministic for a given configuration, so runs on different
+commits measure the same input.
+
+Usage: python benchmarks/synthetic_repo.py <dest> [--files N] [--defs-per-file N] [--depth N] [--language L]
+"""
+import argparse
+import os
+import random
+from typing import List
+
+def make_file(index: int, defs_per_file: int, depth: int, rng: random.Random) -> str:
+    """
+    One module with defs_per_file top-level definitions, alternating classes
+    and functions. Classes nest depth levels deep (depth 1 = a flat class
+    with methods). Names carry the file index so symbols stay unique.
+    """
+    lines: List[str] = ["import os", "import json", "from typing import List, Optional", ""]
+
+    def add_class(name: str, level: int, indent: str):
+        lines.append(f"{indent}class {name}:")
+        for m in range(rng.randint(2, 4)):
+            lines.append(f"{indent}    def method_{m}(self, value: int) -> int:")
+            lines.append(f"{indent}        total = value * {rng.randint(2, 9)}")
+            lines.append(f"{indent}        if total > {rng.randint(10, 99)}:")
+            lines.append(f"{indent}            return total - {m}")
+            lines.append(f"{indent}        return total + len(os.sep)")
+            lines.append("")
+        if level < depth:
+            add_class(f"{name}Inner", level + 1, indent + "    ")
+
+    for d in range(defs_per_file):
+        if d % 2 == 0:
+            add_class(f"Module{index}Class{d}", 1, "")
+        else:
+            lines.append(f"def module{index}_helper_{d}(items: List[str]) -> Optional[str]:")
+            lines.append(f"    data = json.dumps(items)")
+            lines.append(f"    return data[:{rng.randint(5, 50)}] if items else None")
+        lines.append("")
+
+    return "\n".join(lines)
+
+def make_brace_file(index: int, defs_per_file: int, depth: int, rng: random.Random, language: str) -> str:
+    """
+    The same shape as make_file for a brace-delimited language: alternating
+    classes (structs with methods for Go) and free functions, with strings
+    and comments containing braces to keep the lexer honest.
+    """
+    lines: List[str] = []
+    if language == "go":
+        lines.extend([f"package pkg{index}", "", "import (", '\t"fmt"', '\t"strings"', ")", ""])
+    elif language == "java":
+        lines.extend([f"package pkg{index};", "", "import java.util.List;", "import java.util.Map;", "",
+                  f"public class Module{index} {{"])
+    else:
+        lines.extend(["import { readFile } from 'fs';", "const path = require('path');", ""])
+
+    def add_class(name: str, level: int, indent: str):
+        methods = rng.randint(2, 4)
+        if language == "go":
+            lines.extend([f"type {name} struct {{", "\tvalue int", "}", ""])
+            for m in range(methods):
+                lines.extend([f"func (c *{name}) Method{m}(value int) int {{",
+                          f"\ttotal := value * {rng.randint(2, 9)} // {{",
+                          f"\tif total > {rng.randint(10, 99)} {{", f"\t\treturn total - {m}", "\t}",
+                          '\treturn total + len(fmt.Sprint("}"))', "}", ""])
+            return
+        keyword = "static class" if language == "java" else "export class"
+        lines.append(f"{indent}{keyword} {name} {{")
+        for m in range(methods):
+            signature = f"public int method{m}(int value)" if language == "java" else f"method{m}(value{': number' if language == 'typescript' else ''})"
+            declare = "int" if language == "java" else "const"
+            lines.extend([f"{indent}    {signature} {{",
+                      f"{indent}        {declare} total = value * {rng.randint(2, 9)}; // {{",
+                      f"{indent}        if (total > {rng.randint(10, 99)}) {{", f"{indent}            return total - {m};",
+                      f"{indent}        }}", f'{indent}        return total + "}}".length{"()" if language == "java" else ""};',
+                      f"{indent}    }}", ""])
+        if level < depth:
+            add_class(f"{name}Inner", level + 1, indent + "    ")
+        lines.append(f"{indent}}}")
+
+    for d in range(defs_per_file):
+        indent = "    " if language == "java" else ""
+        if d % 2 == 0:
+            add_class(f"Module{index}Class{d}", 1, indent)
+        elif language == "go":
+            lines.extend([f"func Module{index}Helper{d}(items []string) string {{",
+                      f'\treturn strings.Join(items, "{{")[:{rng.randint(5, 50)}]', "}"])
+        elif language == "java":
+            lines.extend([f"    public static String helper{d}(List<String> items) {{",
+                      f'        return String.join("{{", items).substring(0, {rng.randint(5, 50)});', "    }"])
+        else:
+            lines.extend([f"export function module{index}Helper{d}(items) {{",
+                      f"    return `${{items.join('{{')}}`.slice(0, {rng.randint(5, 50)});", "}"])
+        lines.append("")
+
+    if language == "java":
+        lines.append("}")
+    return "\n".join(lines)
+
+EXTENSIONS = {"python": ".py", "javascript": ".js", "typescript": ".ts", "java": ".java", "go": ".go"}
+
+def generate_repo(dest: str, files: int = 100, defs_per_file: int = 10, depth: int = 1,
+                  files_per_dir: int = 50, seed: int = 0, language: str = "python") -> int:
+    """Writes the repository under dest and returns the number of lines written."""
+    rng = random.Random(seed)
+    total_lines = 0
+    for i in range(files):
+        directory = os.path.join(dest, f"pkg{i // files_per_dir}")
+        os.makedirs(directory, exist_ok=True)
+        if language == "python":
+            content = make_file(i, defs_per_file, depth, rng)
+        else:
+            content = make_brace_file(i, defs_per_file, depth, rng, language)
+        name = f"Module{i}" if language == "java" else f"module_{i}"
+        with open(os.path.join(directory, name + EXTENSIONS[language]), 'w', encoding='utf-8') as f:
+            f.write(content)
+        total_lines += content.count("\n") + 1
+    return total_lines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dest")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--defs-per-file", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=1, help="class nesting depth")
+    parser.add_argument("--language", choices=sorted(EXTENSIONS), default="python")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lines = generate_repo(args.dest, args.files, args.defs_per_file, args.depth, seed=args.seed, language=args.language)
+    print(f"Wrote {args.files} {args.language} files ({lines} lines) to {args.dest}")
@@ -1,50 +1,66 @@
-from src.ingest import scan_repository
-from src.chunker import chunk_file
-from src.ai_engine import generate_summary # Assuming you use the updated endpoint version
-from src.writer import inject_docstrings
-import os
-from collections import defaultdict
-
-def main():
-    REPO_PATH = "D:/academics/python/Pong game" 
-    
-    # 1. Scan
-    print(f"--- Phase 1: Scanning {REPO_PATH} ---")
-    files = scan_repository(REPO_PATH)
-
-    # 2. Chunk & Group by File
-    print("\n--- Phase 2: Chunking ---")
-    file_chunks_map = defaultdict(list)
-    
-    for file in files:
-        if file.language == 'python':
-            chunks = chunk_file(file)
-            # We need the FULL system path for the writer to find the file
-            full_path = os.path.join(REPO_PATH, file.file_path)
-            
-            for chunk in chunks:
-                # Store full path in chunk for convenience, or map it
-                file_chunks_map[full_path].append(chunk)
-            
-            print(f"  -> {file.file_path}: {len(chunks)} chunks prepared.")
-
-    # 3. Generate & Inject
-    print("\n--- Phase 3: AI Generation & Injection ---")
-    
-    for file_path, chunks in file_chunks_map.items():
-        print(f"\nProcessing file: {os.path.basename(file_path)}")
-        
-        # A. Generate Summaries
-        for chunk in chunks:
-            print(f"  -> Generating summary for {chunk.chunk_id}...")
-            # This calls your local LLM (Qwen/Llama)
-            chunk.summary = generate_summary(chunk.code, chunk.chunk_id)
-        
-        # B. Inject back into code
-        inject_docstrings(file_path, chunks)
+import argparse
+import sys
+
+# Defaults when run without arguments
+REPO_PATH = "D:/academics/python/Pong game"
+MANIFEST_PATH = "./docgen_manifest.json"
+
+# Modules are imported inside the commands: a --scan (e.g. from a pre-commit
+# hook) never loads the model client or the pipeline threads.
+
+def scan(repo_path: str, manifest_path: str) -> int:
+    """Lists files changed since the last run, without calling the model. Returns 1 if there are any."""
+    from src.ingest import scan_and_chunk
+    from src.manifest import IngestManifest
+    from src.writer import WRITABLE_LANGUAGES
+
+    manifest = IngestManifest(manifest_path, repo_path)
+    changed = 0
+    unreadable = []
+    for file, chunks in scan_and_chunk(repo_path, manifest.known_hashes(), unreadable=unreadable):
+        # Files that can't be written back never need docs
+        if chunks is not None and file.language in WRITABLE_LANGUAGES:
+            changed += 1
+            print(f"  {file.file_path}: {len(chunks)} chunks need docs")
+    for path in unreadable:
+        print(f"  {path}: could not be read")
+
+    print(f"{changed} file(s) changed since the last run.")
+    return 1 if changed else 0
+
+def generate(repo_path: str, manifest_path: str, resume: bool = False) -> int:
+    from src.checkpoint import IngestCheckpoint, CHECKPOINT_SUFFIX
+    from src.manifest import IngestManifest
+    from src.pipeline import IngestPipeline
+
+    print(f"--- Generating docs for {repo_path} ---")
+
+    # Only files added or changed since the last run need new docs
+    manifest = IngestManifest(manifest_path, repo_path)
+    # Summaries and write-backs not yet in the manifest, for --resume after an interruption
+    checkpoint = IngestCheckpoint(manifest_path + CHECKPOINT_SUFFIX)
+
+    # Scan -> Chunk -> AI Generation -> Injection, streamed file by file.
+    # No vector store here: chunks are summarized and written back only.
+    pipeline = IngestPipeline(repo_path, store=None, manifest=manifest, checkpoint=checkpoint, resume=resume)
+    for event in pipeline.run():
+        print(f"  -> {event['message']}")
 
     print("\nDone! Check your source code.")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate docstrings for a repository.")
+    parser.add_argument("repo_path", nargs="?", default=REPO_PATH)
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--scan", action="store_true", help="only list files that need docs (exit code 1 if any)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run instead of starting over")
+    args = parser.parse_args()
+
+    if args.scan:
+        return scan(args.repo_path, args.manifest)
+    return generate(args.repo_path, args.manifest, args.resume)
 
 if __name__ == "__main__":
 
-    main()
+    sys.exit(main())
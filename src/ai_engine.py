@@ -1,6 +1,10 @@
-import requests
 import json
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from .http_client import CircuitOpenError
+from .metrics import METRICS
 
 # --- Configuration ---
 # If running locally, Ollama default is http://localhost:11434/v1
@@ -8,13 +12,181 @@ from typing import List
 API_BASE_URL = "http://localhost:11434/v1" 
 GEN_MODEL = "qwen3:4b"  # Or whatever model is loaded on the server
 EMBED_MODEL = "nomic-embed-text"
+# How many requests we keep in flight against the model server.
+# Match this to the server's parallel slots (e.g. OLLAMA_NUM_PARALLEL).
+MAX_CONCURRENT_REQUESTS = 4
+# Embedding requests carry many texts each. The character budget is a rough
+# stand-in for the embedding model's context limit (~4 chars per token).
+EMBED_BATCH_SIZE = 32
+EMBED_BATCH_MAX_CHARS = 32000
+
+# On-disk cache of summaries/embeddings, keyed on model + prompt version + input hash.
+# Bump PROMPT_VERSION whenever the summary prompt template changes.
+CACHE_ENABLED = True
+CACHE_PATH = "./model_cache/cache.sqlite"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+PROMPT_VERSION = "1"
+# Placeholder summary for chunks the model could not summarize. Means "no summary":
+# never cached, embedded, indexed or written into the source
+SUMMARY_FAILED = "Summary generation failed."
+
+# HTTP behaviour towards the model server. Generation can be slow on small GPUs,
+# so it gets a longer read timeout than embeddings.
+CONNECT_TIMEOUT = 5.0
+GEN_TIMEOUT = 300.0
+EMBED_TIMEOUT = 60.0
+MAX_RETRIES = 3
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# Upper bound on the code excerpts packed into one /ask prompt
+ANSWER_MAX_CONTEXT_CHARS = 12000
+
+_cache = None
+_cache_lock = threading.Lock()
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Returns the shared, connection-pooled client for the model server."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from .http_client import ModelClient
+            _client = ModelClient(
+                API_BASE_URL,
+                pool_size=MAX_CONCURRENT_REQUESTS * 2,
+                connect_timeout=CONNECT_TIMEOUT,
+                max_retries=MAX_RETRIES,
+                breaker_threshold=BREAKER_THRESHOLD,
+                breaker_cooldown=BREAKER_COOLDOWN
+            )
+    return _client
+
+def get_cache():
+    """
+    Opens the shared result cache on first use.
+    Entries from models other than the configured GEN_MODEL/EMBED_MODEL are dropped.
+    """
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            from .cache import ResultCache
+            _cache = ResultCache(CACHE_PATH, max_bytes=CACHE_MAX_BYTES)
+            _cache.invalidate("summary", keep_model=GEN_MODEL)
+            _cache.invalidate("embedding", keep_model=EMBED_MODEL)
+    return _cache
+
+def cache_stats() -> dict:
+    cache = get_cache()
+    return cache.stats() if cache else {}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+def run_concurrently(fn: Callable[[T], R], items: Iterable[T],
+                     max_workers: int = MAX_CONCURRENT_REQUESTS,
+                     max_pending: Optional[int] = None) -> Iterator[Tuple[T, R]]:
+    """
+    Runs fn over items on a bounded thread pool and yields (item, result)
+    pairs as each call finishes. At most max_pending calls are queued or
+    running at once, so items are pulled from the input only as fast as
+    the model server drains them.
+    """
+    max_pending = max_pending or max_workers * 2
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for item in items:
+            pending[pool.submit(fn, item)] = item
+
+            # Backpressure: wait for a slot before submitting more work
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+def summarize_chunks(chunks: Iterable, max_workers: int = MAX_CONCURRENT_REQUESTS) -> Iterator[Tuple[object, str]]:
+    """
+    Generates summaries for many chunks concurrently.
+    Small sibling chunks share a prompt (see packing.py).
+    Yields (chunk, summary) as each one completes.
+    """
+    from .packing import pack_chunks
+
+    def summarize(group):
+        METRICS.inc("ingest_items_total", len(group), stage="summarize")
+        return generate_packed_summaries(group)
+
+    for group, summaries in run_concurrently(summarize, pack_chunks(chunks), max_workers):
+        for (chunk, _), summary in zip(group, summaries):
+            yield chunk, summary
 
 def generate_summary(code: str, chunk_id: str) -> str:
     """
     Sends a POST request to an API endpoint to generate a summary.
     """
-    url = f"{API_BASE_URL}/chat/completions"
-    
+    # The prompt depends on both the symbol name and its code
+    cache_input = f"{chunk_id}\n{code}"
+    cache = get_cache()
+    if cache:
+        cached = cache.get("summary", GEN_MODEL, PROMPT_VERSION, cache_input)
+        if cached is not None:
+            METRICS.inc("llm_requests_total", kind="summary", outcome="cached")
+            return cached
+
+    summary = _request_summary(code, chunk_id)
+    if summary is None:
+        return SUMMARY_FAILED
+    if cache:
+        cache.put("summary", GEN_MODEL, PROMPT_VERSION, cache_input, summary)
+    return summary
+
+def generate_packed_summaries(group: List[Tuple[object, str]]) -> List[str]:
+    """
+    Summarizes several (chunk, prompt code) pairs with one request and
+    returns the summaries in the same order. Cached chunks are left out of
+    the prompt, and any the model skipped are retried one by one.
+    """
+    cache = get_cache()
+    cache_inputs = [f"{chunk.chunk_id}\n{code}" for chunk, code in group]
+    summaries: List[Optional[str]] = [None] * len(group)
+    if cache:
+        for i, cache_input in enumerate(cache_inputs):
+            summaries[i] = cache.get("summary", GEN_MODEL, PROMPT_VERSION, cache_input)
+            if summaries[i] is not None:
+                METRICS.inc("llm_requests_total", kind="summary", outcome="cached")
+
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    failed = False
+    if len(missing) > 1:
+        packed = _request_packed_summaries([group[i] for i in missing])
+        if packed is None:
+            # The request itself failed; retrying each chunk would hit the same server
+            failed = True
+        else:
+            for i in missing:
+                summaries[i] = packed.get(group[i][0].chunk_id)
+
+    for i in missing:
+        if summaries[i] is None and not failed:
+            chunk, code = group[i]
+            summaries[i] = _request_summary(code, chunk.chunk_id)
+        if summaries[i] is None:
+            summaries[i] = SUMMARY_FAILED
+        elif cache:
+            cache.put("summary", GEN_MODEL, PROMPT_VERSION, cache_inputs[i], summaries[i])
+
+    return summaries
+
+def _request_summary(code: str, chunk_id: str) -> Optional[str]:
     prompt = f"""
     You are a technical documentation assistant. 
     Analyze the following code chunk ({chunk_id}).
@@ -24,7 +196,45 @@ def generate_summary(code: str, chunk_id: str) -> str:
     Code:
     {code}
     """
-    
+    return _chat(prompt, chunk_id)
+
+def _request_packed_summaries(group: List[Tuple[object, str]]) -> Optional[dict]:
+    """One prompt for several chunks; returns chunk_id -> summary, or None if the request failed."""
+    sections = "\n\n".join(f"### {chunk.chunk_id}\n{code}" for chunk, code in group)
+    prompt = f"""
+    You are a technical documentation assistant.
+    Analyze each of the following {len(group)} code chunks from {group[0][0].file_path}.
+    For every chunk, provide a indepth and easy to understand sentence, explaining its responsibility.
+    Do not explain syntax, just the purpose.
+    Reply with only a JSON object mapping each chunk name, exactly as written after "###", to its sentence.
+
+    {sections}
+    """
+    content = _chat(prompt, f"{len(group)} chunks of {group[0][0].file_path}", json_mode=True)
+    if content is None:
+        return None
+    return _parse_packed_summaries(content)
+
+def _parse_packed_summaries(content: str) -> dict:
+    """Reads the JSON object out of a packed reply, tolerating code fences and thinking tags."""
+    content = content.split("</think>")[-1]
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(content[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        str(name).strip().strip("`#").strip(): summary.strip()
+        for name, summary in data.items()
+        if isinstance(summary, str) and summary.strip()
+    }
+
+def _chat(prompt: str, description: str, json_mode: bool = False) -> Optional[str]:
+    """One chat completion. Returns None if it failed; CircuitOpenError propagates."""
     payload = {
         "model": GEN_MODEL,
         "messages": [
@@ -33,39 +243,248 @@ def generate_summary(code: str, chunk_id: str) -> str:
         "temperature": 0.1,  # Low temp for factual consistency
         "stream": False
     }
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
 
+    start = time.perf_counter()
     try:
-        # Standard HTTP POST request
-        response = requests.post(url, json=payload, headers={"Content-Type": "application/json"})
-        response.raise_for_status() # Raise error for 4xx/5xx status codes
+        # Pooled keep-alive POST; retries 5xx/connection errors, raises on 4xx
+        response = get_client().post_json("/chat/completions", payload, read_timeout=GEN_TIMEOUT)
         
         # Parse standard OpenAI-compatible JSON response
         data = response.json()
-        return data['choices'][0]['message']['content'].strip()
+        content = data['choices'][0]['message']['content'].strip()
+        _record_generation(time.perf_counter() - start, data.get('usage'))
+        return content
         
+    except CircuitOpenError:
+        # The server is down: fail the caller instead of producing placeholder docs
+        METRICS.inc("llm_requests_total", kind="summary", outcome="circuit_open")
+        raise
+    except Exception as e:
+        METRICS.inc("llm_requests_total", kind="summary", outcome="error")
+        print(f"Error generating summary for {description}: {e}")
+        return None
+
+def _record_generation(seconds: float, usage: Optional[dict], kind: str = "summary"):
+    """Latency and token counts of one successful chat completion."""
+    if kind == "summary":
+        METRICS.observe("ingest_stage_seconds", seconds, stage="summarize")
+    METRICS.inc("llm_requests_total", kind=kind, outcome="ok")
+    METRICS.inc("llm_generation_seconds_total", seconds, kind=kind)
+    if usage and usage.get('prompt_tokens'):
+        METRICS.inc("llm_prompt_tokens_total", usage['prompt_tokens'], kind=kind)
+    if usage and usage.get('completion_tokens'):
+        METRICS.inc("llm_completion_tokens_total", usage['completion_tokens'], kind=kind)
+
+def stream_chat(prompt: str, description: str, kind: str = "answer") -> Iterator[str]:
+    """
+    Streams one chat completion, yielding text as the model generates it
+    (server-sent events from the OpenAI-compatible API).
+    Errors are raised: a half-streamed answer has no sensible fallback.
+    """
+    payload = {
+        "model": GEN_MODEL,
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.1,
+        "stream": True,
+        # Ask for a final usage event so token metrics work while streaming
+        "stream_options": {"include_usage": True}
+    }
+
+    start = time.perf_counter()
+    first_token = None
+    usage = None
+    try:
+        response = get_client().post_json("/chat/completions", payload, read_timeout=GEN_TIMEOUT, stream=True)
+        try:
+            # chunk_size=None hands over each event as soon as it arrives
+            for line in response.iter_lines(chunk_size=None):
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                event = json.loads(data)
+                usage = event.get('usage') or usage
+                for choice in event.get('choices') or []:
+                    text = (choice.get('delta') or {}).get('content')
+                    if not text:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                        METRICS.observe("llm_time_to_first_token_seconds", first_token, kind=kind)
+                    yield text
+        finally:
+            response.close()
+    except CircuitOpenError:
+        METRICS.inc("llm_requests_total", kind=kind, outcome="circuit_open")
+        raise
+    except GeneratorExit:
+        # The consumer stopped reading (e.g. the client disconnected)
+        METRICS.inc("llm_requests_total", kind=kind, outcome="cancelled")
+        raise
     except Exception as e:
-        print(f"Error generating summary for {chunk_id}: {e}")
-        return "Summary generation failed."
+        METRICS.inc("llm_requests_total", kind=kind, outcome="error")
+        print(f"Error streaming {kind} for {description}: {e}")
+        raise
+
+    _record_generation(time.perf_counter() - start, usage, kind=kind)
+
+def _skip_thinking(pieces: Iterable[str]) -> Iterator[str]:
+    """Drops a leading <think>...</think> block (reasoning models) from streamed text."""
+    buffer = ""
+    state = "start"  # -> "thinking" -> "after" -> "text"
+    for piece in pieces:
+        if state == "text":
+            yield piece
+            continue
+        buffer += piece
+        if state == "start":
+            head = buffer.lstrip()
+            if "<think>".startswith(head):
+                continue  # Too short to tell yet
+            state = "thinking" if head.startswith("<think>") else "after"
+        if state == "thinking":
+            if "</think>" not in buffer:
+                continue
+            buffer = buffer.split("</think>", 1)[1]
+            state = "after"
+        # Skip the blank lines between the reasoning and the answer
+        buffer = buffer.lstrip()
+        if buffer:
+            state = "text"
+            yield buffer
+    if state == "start" and buffer.strip():
+        yield buffer.strip()
+
+def answer_question(question: str, sources: List[dict]) -> Iterator[str]:
+    """
+    Streams an answer to a question about the code, grounded in search
+    results (dicts with file, symbol, summary and content, as /search returns).
+    """
+    excerpts, used = [], 0
+    for i, source in enumerate(sources, 1):
+        excerpt = f"[{i}] {source['file']} ({source.get('symbol') or 'module'})\nSummary: {source['summary']}\n{source['content']}"
+        # Keep the prompt bounded; the best matches come first
+        if excerpts and used + len(excerpt) > ANSWER_MAX_CONTEXT_CHARS:
+            break
+        excerpts.append(excerpt[:ANSWER_MAX_CONTEXT_CHARS])
+        used += len(excerpt)
+    context = "\n\n".join(excerpts)
+
+    prompt = f"""
+    You are a technical assistant answering questions about a codebase.
+    Answer using only the numbered code excerpts below, and cite them like [1].
+    If they don't contain the answer, say so.
+
+    {context}
+
+    Question: {question}
+    """
+    return _skip_thinking(stream_chat(prompt, question[:60], kind="answer"))
 
 def get_embedding(text: str) -> List[float]:
     """
     Sends a POST request to an API endpoint to get embeddings.
     """
-    url = f"{API_BASE_URL}/embeddings"
-    
+    cache = get_cache()
+    if cache:
+        cached = cache.get("embedding", EMBED_MODEL, PROMPT_VERSION, text)
+        if cached is not None:
+            return cached
+
     payload = {
         "model": EMBED_MODEL,
         "input": text
     }
 
     try:
-        response = requests.post(url, json=payload, headers={"Content-Type": "application/json"})
-        response.raise_for_status()
+        response = get_client().post_json("/embeddings", payload, read_timeout=EMBED_TIMEOUT)
         
         data = response.json()
         # OpenAI format usually returns data[0]['embedding']
-        return data['data'][0]['embedding']
+        vector = data['data'][0]['embedding']
+        if cache and vector:
+            cache.put("embedding", EMBED_MODEL, PROMPT_VERSION, text, vector)
+        return vector
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         print(f"Error embedding text: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def _split_batches(texts: List[str], batch_size: int, max_chars: int) -> List[List[int]]:
+    """
+    Groups text indexes into batches capped by count and total characters.
+    A single text over the budget still gets a batch of its own.
+    """
+    batches, current, current_chars = [], [], 0
+    for i, text in enumerate(texts):
+        if current and (len(current) >= batch_size or current_chars + len(text) > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(i)
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    payload = {
+        "model": EMBED_MODEL,
+        "input": texts
+    }
+
+    try:
+        with METRICS.timed("embed"):
+            response = get_client().post_json("/embeddings", payload, read_timeout=EMBED_TIMEOUT)
+
+        vectors = [[] for _ in texts]
+        # Each item carries the index of its input; fall back to position
+        for position, item in enumerate(response.json()['data']):
+            vectors[item.get('index', position)] = item['embedding']
+        METRICS.inc("llm_requests_total", kind="embedding", outcome="ok")
+        return vectors
+
+    except CircuitOpenError:
+        METRICS.inc("llm_requests_total", kind="embedding", outcome="circuit_open")
+        raise
+    except Exception as e:
+        METRICS.inc("llm_requests_total", kind="embedding", outcome="error")
+        print(f"Error embedding batch of {len(texts)} texts: {e}")
+        return [[] for _ in texts]
+
+def get_embeddings(texts: List[str], batch_size: int = EMBED_BATCH_SIZE,
+                   max_chars: int = EMBED_BATCH_MAX_CHARS) -> List[List[float]]:
+    """
+    Embeds many texts with one /embeddings request per batch.
+    Returns vectors in the same order as texts; failed entries are empty lists.
+    """
+    vectors: List[List[float]] = [[] for _ in texts]
+
+    # Only texts we haven't embedded before go to the server
+    cache = get_cache()
+    missing = []
+    for i, text in enumerate(texts):
+        cached = cache.get("embedding", EMBED_MODEL, PROMPT_VERSION, text) if cache else None
+        if cached is not None:
+            vectors[i] = cached
+        else:
+            missing.append(i)
+
+    METRICS.inc("ingest_items_total", len(texts), stage="embed")
+    batches = _split_batches([texts[i] for i in missing], batch_size, max_chars)
+
+    embed = lambda batch: _embed_batch([texts[missing[j]] for j in batch])
+    for batch, batch_vectors in run_concurrently(embed, batches):
+        for j, vector in zip(batch, batch_vectors):
+            i = missing[j]
+            vectors[i] = vector
+            if cache and vector:
+                cache.put("embedding", EMBED_MODEL, PROMPT_VERSION, texts[i], vector)
+
+    return vectors
@@ -0,0 +1,229 @@
+# src/brace_chunker.py
+import bisect
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+from .models import CodeFile, CodeChunk, intern_imports
+
+# Chunking for brace-delimited languages with a small single-pass lexer:
+# comments and string literals are blanked out (keeping offsets and line
+# breaks), then only the text before each statement-level "{" is matched
+# against a few declaration patterns. Function bodies are skipped by brace
+# counting, so chunks stay atomic like the Python chunker's.
+
+_C_COMMENT = r"//[^\n]*|/\*[\s\S]*?\*/"
+_DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"'
+_SINGLE_QUOTED = r"'(?:\\.|[^'\\\n])*'"
+# JS regex literals: a "/" where an operand is expected, so "a / b" stays code
+_JS_REGEX = r"(?:(?<=[(,=:\[!&|?{};])|(?<=\breturn))[ \t]*/(?![/*])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*"
+
+# Decorators / annotations, blanked so they don't hide the declaration after them
+_DECORATOR_RE = re.compile(r"@[A-Za-z_$][\w$.]*(?:\s*\((?:[^()]|\([^()]*\))*\))?")
+_TOKEN_RE = re.compile(r"[{}();]")
+_BRACE_RE = re.compile(r"[{}]")
+# Only the tail of a long run of text (e.g. a file's imports) can hold the declaration
+MAX_HEADER_CHARS = 2000
+
+_NOT_A_NAME = {
+    "if", "for", "while", "switch", "catch", "with", "function", "return", "else", "do",
+    "try", "finally", "synchronized", "new", "super", "this", "throw", "case", "default"
+}
+
+_JS_MODIFIERS = r"(?:(?:public|private|protected|static|async|readonly|abstract|override|declare|get|set)\s+)*"
+
+class LanguageSpec:
+    """Declaration patterns for one language. Each pattern's group 1 is the name."""
+    def __init__(self, mask: Pattern, imports: List[Pattern], types: Pattern,
+                 functions: Optional[Pattern] = None, methods: List[Pattern] = (),
+                 containers: Optional[Pattern] = None, go_receivers: bool = False):
+        self.mask = mask
+        self.imports = imports
+        self.types = types
+        self.functions = functions
+        self.methods = list(methods)
+        self.containers = containers
+        self.go_receivers = go_receivers
+
+def _compile(pattern: str) -> Pattern:
+    return re.compile(pattern, re.MULTILINE)
+
+_JS_SPEC = LanguageSpec(
+    mask=re.compile("|".join([_C_COMMENT, _DOUBLE_QUOTED, _SINGLE_QUOTED, r"`(?:\\[\s\S]|[^`\\])*`", _JS_REGEX])),
+    imports=[re.compile(r"""(?:\bfrom\s*|\brequire\s*\(\s*|\bimport\s*\(?\s*)['"]([^'"\n]+)['"]""")],
+    types=_compile(r"^[ \t]*(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:abstract\s+)?(?:class|interface|enum)\s+([A-Za-z_$][\w$]*)[\s\S]*\Z"),
+    functions=_compile(
+        r"^[ \t]*(?:export\s+(?:default\s+)?)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)\s*(?:<[^>]*>)?\s*\([\s\S]*\Z"
+        r"|^[ \t]*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)[^=\n]*=\s*(?:async\s+)?"
+        r"(?:function\b[\s\S]*|(?:\([\s\S]*\)|[A-Za-z_$][\w$]*)\s*(?::[\s\S]*)?=>\s*)\Z"
+    ),
+    methods=[
+        _compile(r"^[ \t]*" + _JS_MODIFIERS + r"\*?\s*(#?[A-Za-z_$][\w$]*)\s*\??\s*(?:<[^>]*>)?\s*\([\s\S]*\)\s*(?::[\s\S]*)?\Z"),
+        _compile(r"^[ \t]*" + _JS_MODIFIERS + r"(#?[A-Za-z_$][\w$]*)\s*(?::[^=]*)?=\s*(?:async\s+)?(?:\([\s\S]*\)|[A-Za-z_$][\w$]*)\s*(?::[\s\S]*)?=>\s*\Z"),
+    ],
+    containers=_compile(r"^[ \t]*(?:export\s+)?(?:declare\s+)?(?:namespace|module)\s+[\w$.]+\s*\Z")
+)
+
+_JAVA_SPEC = LanguageSpec(
+    mask=re.compile("|".join([_C_COMMENT, r'"""[\s\S]*?"""', _DOUBLE_QUOTED, _SINGLE_QUOTED])),
+    imports=[_compile(r"^\s*import\s+(?:static\s+)?([\w.]+(?:\.\*)?)\s*;")],
+    types=_compile(r"^[ \t]*(?:(?:public|protected|private|static|abstract|final|sealed|non-sealed|strictfp)\s+)*(?:class|interface|enum|record)\s+([A-Za-z_$][\w$]*)[\s\S]*\Z"),
+    methods=[_compile(
+        r"^[ \t]*(?![^=]*=)[^;{}()]*?\b([A-Za-z_$][\w$]*)\s*\([^()]*(?:\([^()]*\)[^()]*)*\)\s*(?:\[\s*\]\s*)*(?:throws\s+[\w$.<>,\s]+)?\Z"
+    )]
+)
+
+_GO_SPEC = LanguageSpec(
+    mask=re.compile("|".join([_C_COMMENT, _DOUBLE_QUOTED, _SINGLE_QUOTED, r"`[^`]*`"])),
+    imports=[re.compile(r'^\s*import\s+(?:[\w.]+\s+)?"([^"]+)"', re.MULTILINE),
+             re.compile(r'^\s*(?:[\w.]+\s+)?"([^"]+)"\s*$', re.MULTILINE)],
+    types=_compile(r"^type\s+([A-Za-z_]\w*)(?:\[[^\]]*\])?\s+(?:struct|interface)\s*\Z"),
+    functions=_compile(r"^func\s+(?:\(\s*(?:[A-Za-z_]\w*\s+)?\*?\s*([A-Za-z_]\w*)(?:\[[^\]]*\])?\s*\)\s*)?([A-Za-z_]\w*)[\s\S]*\Z"),
+    go_receivers=True
+)
+
+LANGUAGE_SPECS: Dict[str, LanguageSpec] = {
+    "javascript": _JS_SPEC,
+    "typescript": _JS_SPEC,
+    "java": _JAVA_SPEC,
+    "go": _GO_SPEC,
+}
+
+def _blank(match) -> str:
+    text = match.group()
+    if "\n" not in text:
+        return " " * len(text)
+    return "\n".join(" " * len(part) for part in text.split("\n"))
+
+def _skip_block(masked: str, pos: int) -> int:
+    """Index just past the "}" that closes the block opened right before pos."""
+    depth = 1
+    while depth:
+        m = _BRACE_RE.search(masked, pos)
+        if m is None:
+            return len(masked)
+        depth += 1 if m.group() == "{" else -1
+        pos = m.end()
+    return pos
+
+def _find_imports(content: str, spec: LanguageSpec) -> Tuple[str, ...]:
+    imports: List[str] = []
+    if spec.go_receivers:
+        # Go: single imports plus the lines of import ( ... ) blocks
+        text = "\n".join(re.findall(r"^import\s*\(([\s\S]*?)^\)", content, re.MULTILINE))
+        found = spec.imports[0].findall(content) + spec.imports[1].findall(text)
+    else:
+        found = [name for pattern in spec.imports for name in pattern.findall(content)]
+    for name in found:
+        if name not in imports:
+            imports.append(name)
+    return intern_imports(imports)
+
+def _classify(header: str, spec: LanguageSpec, in_class: Optional[str]) -> Optional[Tuple[str, str, Optional[str], str, int]]:
+    """
+    Matches the text before a "{" against the declaration patterns.
+    Returns (chunk_type, chunk_id, parent, block kind, match offset) or None.
+    """
+    m = spec.types.search(header)
+    if m:
+        return "class", m.group(1), None, "class", m.start(1)
+
+    if in_class is not None:
+        for pattern in spec.methods:
+            m = pattern.search(header)
+            if m and m.group(1) not in _NOT_A_NAME:
+                return "method", f"{in_class}.{m.group(1)}", in_class, "function", m.start(1)
+        return None
+
+    if spec.containers is not None and spec.containers.search(header):
+        return None, None, None, "container", 0
+
+    if spec.functions is not None:
+        m = spec.functions.search(header)
+        if m:
+            if spec.go_receivers:
+                receiver, name = m.group(1), m.group(2)
+                if receiver:
+                    return "method", f"{receiver}.{name}", receiver, "function", m.start(2)
+                return "function", name, None, "function", m.start(2)
+            group = 1 if m.group(1) else 2
+            if m.group(group) not in _NOT_A_NAME:
+                return "function", m.group(group), None, "function", m.start(group)
+    return None
+
+def chunk_braces(file: CodeFile) -> List[CodeChunk]:
+    """Chunks a JS/TS, Java or Go file into classes/types, methods and functions."""
+    spec = LANGUAGE_SPECS[file.language]
+    content = file.content
+    masked = _DECORATOR_RE.sub(_blank, spec.mask.sub(_blank, content))
+    line_starts = file.line_starts()
+    imports = _find_imports(content, spec)
+
+    def line_of(offset: int) -> int:
+        return bisect.bisect_right(line_starts, offset)
+
+    # [chunk_type, chunk_id, parent, start_line, end_line]; classes are added
+    # when they open so chunks come out in source order, like ast's
+    found: List[list] = []
+    # Open class / container blocks: (kind, class name, index into found or -1)
+    stack: List[Tuple[str, Optional[str], int]] = []
+    paren = 0
+    stmt_start = 0
+    pos = 0
+
+    while True:
+        m = _TOKEN_RE.search(masked, pos)
+        if m is None:
+            break
+        char, i = m.group(), m.start()
+        pos = i + 1
+
+        if char == "(":
+            paren += 1
+        elif char == ")":
+            paren = max(0, paren - 1)
+        elif char == ";":
+            if paren == 0:
+                stmt_start = pos
+        elif char == "}":
+            if stack:
+                _, _, index = stack.pop()
+                if index >= 0:
+                    found[index][4] = line_of(i)
+            stmt_start = pos
+        elif paren > 0:
+            # Object literal or callback inside an expression: not a declaration
+            pos = _skip_block(masked, pos)
+        else:
+            header_start = max(stmt_start, i - MAX_HEADER_CHARS)
+            in_class = stack[-1][1] if stack and stack[-1][0] == "class" else None
+            opaque = stack and stack[-1][0] not in ("class", "container")
+            decl = None if opaque else _classify(masked[header_start:i], spec, in_class)
+
+            if decl is not None and decl[3] in ("class", "container"):
+                chunk_type, chunk_id, parent, kind, offset = decl
+                index = -1
+                if kind == "class":
+                    index = len(found)
+                    found.append([chunk_type, chunk_id, parent, line_of(header_start + offset), line_of(i)])
+                stack.append((kind, chunk_id, index))
+                stmt_start = pos
+                continue
+
+            # Function bodies and other blocks are skipped wholesale
+            end = _skip_block(masked, pos)
+            if decl is not None:
+                chunk_type, chunk_id, parent, _, offset = decl
+                found.append([chunk_type, chunk_id, parent, line_of(header_start + offset), line_of(end - 1)])
+            pos = stmt_start = end
+
+    chunks = []
+    for chunk_type, chunk_id, parent, start_line, end_line in found:
+        chunks.append(CodeChunk(
+            chunk_id=chunk_id,
+            chunk_type=chunk_type,
+            file=file,
+            start_line=start_line,
+            end_line=end_line,
+            parent=parent,
+            imports=imports
+        ))
+    return chunks
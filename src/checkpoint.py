@@ -0,0 +1,126 @@
+# src/checkpoint.py
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Tuple
+
+from .models import CodeChunk
+
+CHECKPOINT_SUFFIX = ".checkpoint.sqlite"
+
+class IngestCheckpoint:
+    """
+    Durable per-chunk progress of an ingest, backed by SQLite.
+    Records which chunks have been summarized (with their summary) and
+    upserted, and which files were written back, keyed on the file hash
+    they were scanned at. An interrupted ingest resumed from it only does
+    the work that is left. The manifest stays the record of finished
+    files; rows are dropped once their file is saved there.
+    """
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+
+        # One connection shared by the stage threads, serialized by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL survives a killed process; only a power cut can lose the last commits
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                file_path TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                upserted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (file_path, chunk_id)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                file_path TEXT PRIMARY KEY,
+                written_hash TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def begin(self, version: str, resume: bool) -> Dict[str, int]:
+        """
+        Starts a run. Keeps the saved progress if resume is set and it was
+        made with the same model/prompt version, otherwise discards it.
+        Returns what is being resumed.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if not resume or (row is not None and row[0] != version):
+                self._clear()
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+            self._conn.commit()
+            return self._progress()
+
+    def _progress(self) -> Dict[str, int]:
+        summarized, upserted = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(upserted), 0) FROM chunks"
+        ).fetchone()
+        written = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {"chunks_summarized": summarized, "chunks_indexed": upserted, "files_written": written}
+
+    def load(self, file_path: str, file_hash: str) -> Dict[str, Tuple[str, bool]]:
+        """chunk_id -> (summary, upserted) saved for this version of the file."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id, summary, upserted FROM chunks WHERE file_path = ? AND file_hash = ?",
+                (file_path, file_hash)
+            ).fetchall()
+        return {chunk_id: (summary, bool(upserted)) for chunk_id, summary, upserted in rows}
+
+    def was_written(self, file_path: str, file_hash: str) -> bool:
+        """Whether an interrupted run wrote this file back, leaving it at file_hash."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM files WHERE file_path = ? AND written_hash = ?", (file_path, file_hash)
+            ).fetchone()
+        return row is not None
+
+    def record_summaries(self, chunks: Iterable[CodeChunk]):
+        rows = [(c.file_path, c.chunk_id, c.file.file_hash, c.summary) for c in chunks]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (file_path, chunk_id, file_hash, summary) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def record_upserted(self, chunks: Iterable[CodeChunk]):
+        rows = [(c.file_path, c.chunk_id) for c in chunks]
+        with self._lock:
+            self._conn.executemany("UPDATE chunks SET upserted = 1 WHERE file_path = ? AND chunk_id = ?", rows)
+            self._conn.commit()
+
+    def record_written(self, file_path: str, written_hash: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (file_path, written_hash) VALUES (?, ?)", (file_path, written_hash)
+            )
+            self._conn.commit()
+
+    def forget(self, file_paths: Iterable[str]):
+        """Drops the progress of files that are now saved in the manifest."""
+        rows = [(path,) for path in file_paths]
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE file_path = ?", rows)
+            self._conn.executemany("DELETE FROM files WHERE file_path = ?", rows)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+            self._conn.commit()
+
+    def _clear(self):
+        self._conn.execute("DELETE FROM chunks")
+        self._conn.execute("DELETE FROM files")
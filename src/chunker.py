@@ -1,6 +1,9 @@
 import ast
-from typing import List
+import sys
+import threading
+from typing import Callable, Dict, List
 from .models import CodeFile, CodeChunk
+from .brace_chunker import LANGUAGE_SPECS, chunk_braces
 
 class PythonChunker(ast.NodeVisitor):
     def __init__(self, file_data: CodeFile):
@@ -8,17 +11,25 @@ class PythonChunker(ast.NodeVisitor):
         self.chunks: List[CodeChunk] = []
         self.current_class = None
         self.imports = []
+        # De-duplicated view of self.imports, rebuilt only when a new import is seen;
+        # chunks in between share the same tuple
+        self._unique_imports = ()
 
     def visit_Import(self, node):
         for alias in node.names:
-            self.imports.append(alias.name)
+            self._add_import(alias.name)
         self.generic_visit(node)
 
     def visit_ImportFrom(self, node):
         if node.module:
-            self.imports.append(node.module)
+            self._add_import(node.module)
         self.generic_visit(node)
 
+    def _add_import(self, name):
+        self.imports.append(name)
+        if name not in self._unique_imports:
+            self._unique_imports = self._unique_imports + (sys.intern(name),)
+
     def visit_ClassDef(self, node):
         # Capture class context
         chunk_id = f"{node.name}"
@@ -43,33 +54,35 @@ class PythonChunker(ast.NodeVisitor):
 
         self._create_chunk(node, chunk_type, chunk_id, parent)
         # We don't visit internal nodes of functions to keep chunks atomic
+
+    # async def chunks exactly like def
+    visit_AsyncFunctionDef = visit_FunctionDef
     
     def _create_chunk(self, node, chunk_type, chunk_id, parent=None):
-        # Extract source code segment
-        lines = self.file_data.content.splitlines()
-        # ast line numbers are 1-based
-        start = node.lineno - 1
-        end = node.end_lineno
-        chunk_code = "\n".join(lines[start:end])
-
+        # The chunk keeps line numbers (1-based, like ast's) into the file, not a copy of the code
         self.chunks.append(CodeChunk(
             chunk_id=chunk_id,
             chunk_type=chunk_type,
-            file_path=self.file_data.file_path,
+            file=self.file_data,
             start_line=node.lineno,
             end_line=node.end_lineno,
-            code=chunk_code,
             parent=parent,
-            imports=list(set(self.imports)) # Attach current known imports
+            imports=self._unique_imports # Attach current known imports
         ))
 
-def chunk_file(file: CodeFile) -> List[CodeChunk]:
-    if file.language != 'python':
-        print(f"Skipping chunking for non-python file: {file.file_path}")
-        return []
-        
+# ast.parse is not thread-safe on CPython 3.11 before 3.11.9 ("AST constructor
+# recursion depth mismatch"), and the scan, summarize (class skeletons) and
+# write-back threads all parse. It holds the GIL throughout anyway, so
+# serializing costs nothing.
+_parse_lock = threading.Lock()
+
+def parse_python(source: str) -> ast.Module:
+    with _parse_lock:
+        return ast.parse(source)
+
+def chunk_python(file: CodeFile) -> List[CodeChunk]:
     try:
-        tree = ast.parse(file.content)
+        tree = parse_python(file.content)
         chunker = PythonChunker(file)
         chunker.visit(tree)
         return chunker.chunks
@@ -77,3 +90,19 @@ def chunk_file(file: CodeFile) -> List[CodeChunk]:
         print(f"Syntax Error in {file.file_path}")
 
         return []
+
+# Chunkers keyed on CodeFile.language
+CHUNKERS: Dict[str, Callable[[CodeFile], List[CodeChunk]]] = {'python': chunk_python}
+CHUNKERS.update({language: chunk_braces for language in LANGUAGE_SPECS})
+
+def register_chunker(language: str, chunker: Callable[[CodeFile], List[CodeChunk]]):
+    """Adds or replaces the chunker used for files of the given language."""
+    CHUNKERS[language] = chunker
+
+def chunk_file(file: CodeFile) -> List[CodeChunk]:
+    chunker = CHUNKERS.get(file.language)
+    if chunker is None:
+        print(f"Skipping chunking for unsupported language: {file.file_path}")
+        return []
+
+    return chunker(file)
@@ -0,0 +1,113 @@
+# src/http_client.py
+import random
+import threading
+import time
+from typing import Optional, Tuple
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the server while the circuit breaker is open."""
+
+class ModelClient:
+    """
+    Shared HTTP client for the model backend.
+    Reuses keep-alive connections from a pool, applies per-call timeouts,
+    retries 5xx responses and connection errors with exponential backoff,
+    and stops calling a server that keeps failing (circuit breaker).
+    """
+    def __init__(self, base_url: str, pool_size: int = 16,
+                 connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        # Imported here so modules that only need CircuitOpenError stay light
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    def post_json(self, path: str, payload: dict, read_timeout: Optional[float] = None,
+                  stream: bool = False) -> "requests.Response":
+        """
+        POSTs a JSON payload and returns the successful response.
+        Raises CircuitOpenError while the breaker is open, requests.HTTPError
+        for 4xx responses (not retried) and the last error once retries run out.
+        """
+        import requests
+
+        url = f"{self.base_url}{path}"
+        timeout: Tuple[float, float] = (self.connect_timeout, read_timeout or self.read_timeout)
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            self._before_call()
+            try:
+                response = self.session.post(url, json=payload, timeout=timeout, stream=stream)
+                if response.status_code < 500:
+                    self._record_success()
+                    response.raise_for_status()
+                    return response
+                last_error = requests.HTTPError(f"{response.status_code} Server Error for url: {url}", response=response)
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+            except requests.RequestException:
+                # Not a server health problem (bad URL, 4xx...): don't count it
+                with self._lock:
+                    self._probing = False
+                raise
+
+            self._record_failure()
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt))
+
+        raise last_error
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with jitter so parallel workers don't retry in lockstep
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    # --- Circuit breaker ---
+
+    def _before_call(self):
+        with self._lock:
+            if self._failures < self.breaker_threshold:
+                return
+            if time.monotonic() < self._open_until or self._probing:
+                raise CircuitOpenError(f"Model server at {self.base_url} is failing; not sending requests for now")
+            # Half-open: let a single probe request through
+            self._probing = True
+
+    def _record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.breaker_threshold:
+                self._open_until = time.monotonic() + self.breaker_cooldown
+
+    @property
+    def circuit_open(self) -> bool:
+        with self._lock:
+            return self._failures >= self.breaker_threshold and time.monotonic() < self._open_until
@@ -1,19 +1,33 @@
 # src/ingest.py
 import os
 import hashlib
-from typing import List
-from .models import CodeFile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import CodeFile, CodeChunk
+from .chunker import chunk_file
+from .metrics import METRICS
 
 # Configuration
-INCLUDE_EXTENSIONS = {'.py', '.js', '.ts', '.java', '.go'}
+INCLUDE_EXTENSIONS = {'.py', '.js', '.jsx', '.mjs', '.ts', '.tsx', '.java', '.go'}
 EXCLUDE_DIRS = {'node_modules', 'venv', 'dist', 'build', '__pycache__', '.git'}
+# Basic language detection map
+LANGUAGE_MAP = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript', '.java': 'java', '.go': 'go'
+}
+# Below this many files, scan_and_chunk runs inline instead of starting worker processes
+PARALLEL_MIN_FILES = 64
 
 def calculate_hash(content: str) -> str:
     return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
-def scan_repository(repo_path: str) -> List[CodeFile]:
-    results = []
-    
+def hash_file(full_path: str) -> str:
+    """Hashes a file on disk the same way scan_repository does."""
+    with open(full_path, 'r', encoding='utf-8') as f:
+        return calculate_hash(f.read())
+
+def iter_source_paths(repo_path: str) -> Iterator[Tuple[str, str]]:
+    """Walks the repository and yields (full_path, rel_path) for every source file."""
     for root, dirs, files in os.walk(repo_path):
         # Modify dirs in-place to skip excluded directories
         dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
@@ -24,26 +38,120 @@ def scan_repository(repo_path: str) -> List[CodeFile]:
                 continue
                 
             full_path = os.path.join(root, file)
-            rel_path = os.path.relpath(full_path, repo_path)
+            yield full_path, os.path.relpath(full_path, repo_path)
+
+def load_file(full_path: str, rel_path: str) -> Optional[CodeFile]:
+    """Reads and hashes one file. Returns None if it can't be read."""
+    try:
+        with open(full_path, 'r', encoding='utf-8') as f:
+            content = f.read()
             
-            try:
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                loc = len(content.splitlines())
-                file_hash = calculate_hash(content)
-                
-                # Basic language detection map
-                lang_map = {'.py': 'python', '.js': 'javascript', '.ts': 'typescript'}
-                
-                results.append(CodeFile(
-                    file_path=rel_path,
-                    language=lang_map.get(ext, 'unknown'),
-                    content=content,
-                    file_hash=file_hash,
-                    loc=loc
-                ))
-            except Exception as e:
-                print(f"Skipping {rel_path}: {e}")
+        loc = len(content.splitlines())
+        file_hash = calculate_hash(content)
+        ext = os.path.splitext(full_path)[1]
+        
+        return CodeFile(
+            file_path=rel_path,
+            language=LANGUAGE_MAP.get(ext, 'unknown'),
+            content=content,
+            file_hash=file_hash,
+            loc=loc
+        )
+    except Exception as e:
+        print(f"Skipping {rel_path}: {e}")
+        return None
+
+def scan_repository(repo_path: str) -> List[CodeFile]:
+    results = []
+    
+    for full_path, rel_path in iter_source_paths(repo_path):
+        file = load_file(full_path, rel_path)
+        if file is not None:
+            results.append(file)
                 
-    return results
\ No newline at end of file
+    return results
+
+def _load_and_chunk(job: Tuple[str, str, Optional[str]]) -> Optional[Tuple[CodeFile, Optional[List[CodeChunk]], Tuple[float, float]]]:
+    """
+    Worker for scan_and_chunk: read, hash and (if changed) chunk one file.
+    Unchanged files come back without content or chunks to keep the
+    result cheap to send between processes. Also returns how long reading
+    and chunking took, since worker processes can't record metrics themselves.
+    """
+    full_path, rel_path, known_hash = job
+    start = time.perf_counter()
+    file = load_file(full_path, rel_path)
+    scan_seconds = time.perf_counter() - start
+    if file is None:
+        return None
+
+    if file.file_hash == known_hash:
+        file.content = ""
+        return file, None, (scan_seconds, 0.0)
+
+    start = time.perf_counter()
+    chunks = chunk_file(file)
+    return file, chunks, (scan_seconds, time.perf_counter() - start)
+
+def _record_scan_metrics(result) -> Tuple[CodeFile, Optional[List[CodeChunk]]]:
+    file, chunks, (scan_seconds, chunk_seconds) = result
+    METRICS.observe("ingest_stage_seconds", scan_seconds, stage="scan")
+    METRICS.inc("ingest_items_total", stage="scan")
+    if chunks is not None:
+        METRICS.observe("ingest_stage_seconds", chunk_seconds, stage="chunk")
+        METRICS.inc("ingest_items_total", len(chunks), stage="chunk")
+    return file, chunks
+
+def scan_and_chunk(repo_path: str, known_hashes: Optional[Dict[str, str]] = None,
+                   max_workers: Optional[int] = None,
+                   unreadable: Optional[List[str]] = None) -> Iterator[Tuple[CodeFile, Optional[List[CodeChunk]]]]:
+    """
+    Reads, hashes and chunks files of every supported language across a process pool.
+    Yields (file, chunks) as each file finishes, in completion order, so
+    downstream stages can start before the whole repository is scanned.
+    chunks is None for files whose hash matches known_hashes (unchanged).
+    Files that exist but can't be read (permissions, encoding, locked) are
+    not yielded; their relative paths are appended to unreadable if given.
+    """
+    unreadable = unreadable if unreadable is not None else []
+    known_hashes = known_hashes or {}
+    jobs = [(full_path, rel_path, known_hashes.get(rel_path))
+            for full_path, rel_path in iter_source_paths(repo_path)]
+
+    # Small repos aren't worth the cost of starting worker processes
+    if len(jobs) < PARALLEL_MIN_FILES:
+        for job in jobs:
+            result = _load_and_chunk(job)
+            if result is None:
+                unreadable.append(job[1])
+            else:
+                yield _record_scan_metrics(result)
+        return
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_workers * 4
+    jobs = iter(jobs)
+    pending = {}
+
+    # "spawn" keeps workers safe to start from a threaded server process
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while True:
+            # Keep a bounded number of files in flight
+            for job in jobs:
+                pending[pool.submit(_load_and_chunk, job)] = job[1]
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_path = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    unreadable.append(rel_path)
+                else:
+                    yield _record_scan_metrics(result)
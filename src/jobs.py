@@ -0,0 +1,115 @@
+# src/jobs.py
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Keep at most this many progress events per job; older ones are dropped
+MAX_JOB_EVENTS = 5000
+# Finished jobs kept around so their final status can still be queried
+MAX_FINISHED_JOBS = 50
+
+class IngestJob:
+    """
+    An ingest pipeline running on a background thread.
+    Progress events are buffered so any number of clients can follow along,
+    and a client disconnecting never stops the job.
+    """
+    def __init__(self, repo: str, repo_path: str, pipeline):
+        self.id = uuid.uuid4().hex[:12]
+        self.repo = repo
+        self.repo_path = repo_path
+        self.pipeline = pipeline
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.last_message = ""
+
+        self._events: List[dict] = []
+        # Absolute index of self._events[0], so cursors survive trimming
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.status = "running"
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for event in self.pipeline.run():
+                self._append(event)
+        except Exception as e:
+            self._append({"status": "error", "message": str(e)})
+        finally:
+            self.finished_at = time.time()
+
+    def _append(self, event: dict):
+        with self._lock:
+            self._events.append(event)
+            if len(self._events) > MAX_JOB_EVENTS:
+                drop = len(self._events) - MAX_JOB_EVENTS // 2
+                del self._events[:drop]
+                self._offset += drop
+            self.last_message = event.get("message", "")
+            if event.get("status") in ("complete", "error", "cancelled"):
+                self.status = event["status"]
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ("queued", "running")
+
+    def cancel(self):
+        if not self.finished:
+            self.pipeline.cancel()
+
+    def events_since(self, cursor: int) -> Tuple[List[dict], int]:
+        """Returns the events after cursor and the new cursor."""
+        with self._lock:
+            start = max(cursor - self._offset, 0)
+            events = self._events[start:]
+            return events, self._offset + len(self._events)
+
+    def snapshot(self) -> dict:
+        return {
+            "job_id": self.id,
+            "repo": self.repo,
+            "path": self.repo_path,
+            "status": self.status,
+            "message": self.last_message,
+            "progress": dict(self.pipeline.counts),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+class JobManager:
+    """
+    Tracks ingest jobs; at most one active job per repository name, since
+    the manifest and checkpoint of a run are keyed on it.
+    """
+    def __init__(self):
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, repo: str, repo_path: str, make_pipeline: Callable[[], object]) -> IngestJob:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.repo == repo and not job.finished:
+                    raise ValueError(f"Ingest job {job.id} is already running for repository {repo!r}")
+
+            job = IngestJob(repo, repo_path, make_pipeline())
+            self._jobs[job.id] = job
+            self._prune()
+        job.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        return list(self._jobs.values())
+
+    def _prune(self):
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.created_at)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
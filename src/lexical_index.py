@@ -0,0 +1,212 @@
+# src/lexical_index.py
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# One index file per repository namespace, under the vector DB directory
+LEXICAL_INDEX_DIR = "lexical"
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_WORD_PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits code or a query into lowercase identifier tokens.
+    Compound identifiers also contribute their parts, so "PaddleController"
+    matches "paddle" and "move_paddle" matches "move".
+    """
+    tokens = []
+    for identifier in _IDENTIFIER_RE.findall(text):
+        tokens.append(identifier.lower())
+        parts = [p.lower() for piece in identifier.split("_") for p in _WORD_PART_RE.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+def normalize_symbol(text: str) -> str:
+    """Canonical form for exact symbol lookups: "`Ball.move()`" -> "ball.move"."""
+    text = text.strip().strip("`'\"").strip()
+    if text.endswith("()"):
+        text = text[:-2]
+    return text.casefold()
+
+class LexicalIndex:
+    """
+    In-process inverted index over chunk identifiers and code tokens,
+    scored with BM25, plus an exact symbol table for identifier lookups.
+    Persisted as JSON next to the vector DB. Queries reload the file when
+    another process saved a newer version; a read_only index never saves.
+    """
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75,
+                 save_interval: float = 30.0, read_only: bool = False):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.save_interval = save_interval
+        self.read_only = read_only
+
+        # doc_id -> {"symbol": ..., "tf": {term: count}, "len": n}
+        self._docs: Dict[str, dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._symbols: Dict[str, set] = defaultdict(set)
+        self._total_length = 0
+        self._dirty = False
+        # Bumped on every change, so a save only clears _dirty if nothing changed while it wrote
+        self._changes = 0
+        self._last_save = 0.0
+        # (mtime_ns, size) of the file version held in memory
+        self._loaded: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @property
+    def exists_on_disk(self) -> bool:
+        return bool(self.path) and os.path.exists(self.path)
+
+    # --- Updates ---
+
+    def add(self, doc_id: str, symbol: str, text: str):
+        """Indexes (or re-indexes) one document under its symbol name."""
+        tf = Counter(tokenize(text))
+        with self._lock:
+            self._remove(doc_id)
+            self._insert(doc_id, normalize_symbol(symbol), dict(tf), sum(tf.values()))
+            self._dirty = True
+            self._changes += 1
+
+    def remove(self, doc_ids: Iterable[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+            self._dirty = True
+            self._changes += 1
+
+    def _insert(self, doc_id: str, symbol: str, tf: Dict[str, int], length: int):
+        self._docs[doc_id] = {"symbol": symbol, "tf": tf, "len": length}
+        self._total_length += length
+        for term, count in tf.items():
+            self._postings[term][doc_id] = count
+        self._symbols[symbol].add(doc_id)
+
+    def _remove(self, doc_id: str):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc["len"]
+        for term in doc["tf"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        ids = self._symbols.get(doc["symbol"])
+        if ids is not None:
+            ids.discard(doc_id)
+            if not ids:
+                del self._symbols[doc["symbol"]]
+
+    # --- Queries ---
+
+    def lookup_symbol(self, query: str) -> List[str]:
+        """Doc ids whose symbol name is exactly the query (case-insensitive)."""
+        self.refresh()
+        with self._lock:
+            return sorted(self._symbols.get(normalize_symbol(query), ()))
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """Top documents by BM25 score as (doc_id, score)."""
+        terms = set(tokenize(query))
+        self.refresh()
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._docs[doc_id]["len"]
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+
+    # --- Persistence ---
+
+    def save(self, force: bool = False):
+        """
+        Writes the index if it changed. Without force, saves at most once per
+        save_interval so frequent small upserts don't rewrite it every time.
+        """
+        if not self.path or self.read_only:
+            return
+        with self._lock:
+            if not self._dirty or (not force and time.monotonic() - self._last_save < self.save_interval):
+                return
+            data = {doc_id: [doc["symbol"], doc["tf"]] for doc_id, doc in self._docs.items()}
+            changes = self._changes
+            self._last_save = time.monotonic()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            stat = os.fstat(f.fileno())
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._loaded = (stat.st_mtime_ns, stat.st_size)
+            # Still dirty while writing, so refresh() never reloads an older file over our changes
+            self._dirty = self._changes != changes
+
+    def refresh(self):
+        """
+        Reloads the index if the file changed since it was loaded or saved
+        here, e.g. a read_only reader following a writer process. A writer's
+        unsaved changes are never discarded.
+        """
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._loaded == (stat.st_mtime_ns, stat.st_size) or (self._dirty and not self.read_only):
+                return
+            self._docs.clear()
+            self._postings.clear()
+            self._symbols.clear()
+            self._total_length = 0
+            self._dirty = False
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stat = os.fstat(f.fileno())
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable lexical index {self.path}: {e}")
+            return
+        self._loaded = (stat.st_mtime_ns, stat.st_size)
+        for doc_id, (symbol, tf) in data.items():
+            self._insert(doc_id, symbol, tf, sum(tf.values()))
@@ -0,0 +1,80 @@
+# src/manifest.py
+import json
+import os
+import threading
+from typing import Dict, List
+
+MANIFEST_FILENAME = "ingest_manifest.json"
+
+# Concurrent ingest jobs share the manifest file, one section per repository
+_save_lock = threading.Lock()
+
+class IngestManifest:
+    """
+    Persistent record of what has already been ingested for a repository.
+    Maps each relative file path to the hash it was processed at and the
+    chunk ids it produced, so unchanged files can be skipped on re-ingest.
+    """
+    def __init__(self, manifest_path: str, repo_path: str):
+        self.manifest_path = manifest_path
+        self.repo_key = os.path.abspath(repo_path)
+        self._data = self._load()
+        self.files: Dict[str, dict] = self._data.setdefault(self.repo_key, {})
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            # A corrupt manifest only costs us a full re-ingest
+            print(f"Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return {}
+
+    def save(self):
+        """
+        Writes the manifest through a temp file so a crash never leaves it half-written.
+        Only this repository's section is ours: the others are re-read from
+        disk first, so jobs for other repositories don't overwrite each other.
+        """
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _save_lock:
+            self._data = self._load()
+            self._data[self.repo_key] = self.files
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.manifest_path)
+
+    def other_repos(self) -> List[str]:
+        """Other repository paths with entries in this manifest file."""
+        return [key for key, files in self._data.items() if key != self.repo_key and files]
+
+    def known_hashes(self) -> Dict[str, str]:
+        return {path: entry['hash'] for path, entry in self.files.items()}
+
+    def removed(self, seen_paths) -> List[str]:
+        """Paths in the manifest that were not seen in the latest scan."""
+        return [path for path in self.files if path not in seen_paths]
+
+    def record(self, file_path: str, file_hash: str, chunk_ids: List[str]):
+        self.files[file_path] = {"hash": file_hash, "chunk_ids": list(chunk_ids)}
+
+    def forget(self, file_path: str) -> List[str]:
+        """Drops a file from the manifest and returns the chunk ids it owned."""
+        entry = self.files.pop(file_path, None)
+        if not entry:
+            return []
+        return list(entry['chunk_ids'])
+
+    def stale_chunk_ids(self, file_path: str, current_ids: List[str]) -> List[str]:
+        """Chunk ids this file produced last time that it no longer produces."""
+        entry = self.files.get(file_path)
+        if not entry:
+            return []
+        # Ids include the file path (namespaces.document_id), so no other file shares them
+        current = set(current_ids)
+        return [cid for cid in entry['chunk_ids'] if cid not in current]
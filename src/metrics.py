@@ -0,0 +1,208 @@
+# src/metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Latency buckets in seconds, from fast local work up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRIC_HELP = {
+    "ingest_stage_seconds": ("histogram", "Latency of one unit of work per ingest stage (file, chunk, request or batch)."),
+    "ingest_items_total": ("counter", "Items processed per ingest stage."),
+    "ingest_queue_depth": ("gauge", "Items waiting in each pipeline queue."),
+    "llm_requests_total": ("counter", "Requests sent to the model server, by kind and outcome."),
+    "llm_prompt_tokens_total": ("counter", "Prompt tokens sent to the model server, by kind."),
+    "llm_completion_tokens_total": ("counter", "Completion tokens generated by the model server, by kind."),
+    "llm_generation_seconds_total": ("counter", "Wall time spent waiting on chat completions, by kind."),
+    "llm_time_to_first_token_seconds": ("histogram", "Time from sending a streamed chat request to its first token."),
+}
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> "Histogram":
+        other = Histogram(self.buckets)
+        other.counts = list(self.counts)
+        other.sum = self.sum
+        other.count = self.count
+        return other
+
+    def minus(self, earlier: Optional["Histogram"]) -> "Histogram":
+        """Observations made since an earlier copy of this histogram."""
+        diff = self.copy()
+        if earlier is not None:
+            diff.counts = [a - b for a, b in zip(self.counts, earlier.counts)]
+            diff.sum -= earlier.sum
+            diff.count -= earlier.count
+        return diff
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= target and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and histograms, rendered in the Prometheus
+    text format. Cheap enough to call from worker threads on every request.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[LabelKey, float] = {}
+        self._gauges: Dict[LabelKey, float] = {}
+        self._histograms: Dict[LabelKey, Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> LabelKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Records the block's duration under ingest_stage_seconds{stage=...}."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("ingest_stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {key: h.copy() for key, h in self._histograms.items()}
+            }
+
+    def render(self, extra_gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text exposition of everything recorded so far."""
+        snap = self.snapshot()
+        gauges = dict(snap["gauges"])
+        for name, value in (extra_gauges or {}).items():
+            gauges[(name, ())] = value
+
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                help_text = METRIC_HELP.get(name, (kind, name))[1]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(snap["counters"].items()):
+            describe(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            describe(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(snap["histograms"].items()):
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return "{" + inner + "}"
+
+def summarize_since(before: dict, elapsed: float) -> dict:
+    """
+    Compact report of what was recorded after `before` (a snapshot()):
+    per-stage latency, throughput and LLM token rate. Used for the final
+    ingest event; overlapping jobs in one process share these numbers.
+    """
+    now = METRICS.snapshot()
+
+    def counter(name: str, **labels) -> float:
+        key = MetricsRegistry._key(name, labels)
+        return now["counters"].get(key, 0.0) - before["counters"].get(key, 0.0)
+
+    stages = {}
+    for key, histogram in now["histograms"].items():
+        name, labels = key
+        if name != "ingest_stage_seconds":
+            continue
+        diff = histogram.minus(before["histograms"].get(key))
+        if not diff.count:
+            continue
+        stage = dict(labels)["stage"]
+        stages[stage] = {
+            "count": diff.count,
+            "total_seconds": round(diff.sum, 3),
+            "avg_seconds": round(diff.sum / diff.count, 4),
+            "p50_seconds": round(diff.quantile(0.5), 4),
+            "p99_seconds": round(diff.quantile(0.99), 4)
+        }
+
+    # Summaries only: /ask answers streamed meanwhile don't count towards the ingest
+    tokens = counter("llm_completion_tokens_total", kind="summary")
+    prompt_tokens = counter("llm_prompt_tokens_total", kind="summary")
+    generation_seconds = counter("llm_generation_seconds_total", kind="summary")
+    indexed = counter("ingest_items_total", stage="upsert")
+    summarized = counter("ingest_items_total", stage="summarize")
+    cached = counter("llm_requests_total", kind="summary", outcome="cached")
+    requested = sum(counter("llm_requests_total", kind="summary", outcome=o) for o in ("ok", "error", "circuit_open"))
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "stages": stages,
+        "chunks_per_second": round((indexed or summarized) / elapsed, 3) if elapsed else 0.0,
+        "llm_requests": int(requested),
+        "llm_prompt_tokens": int(prompt_tokens),
+        "llm_completion_tokens": int(tokens),
+        # Aggregate rate across all concurrent requests, and the rate one request sees
+        "llm_tokens_per_second": round(tokens / elapsed, 2) if elapsed else 0.0,
+        "llm_tokens_per_second_per_request": round(tokens / generation_seconds, 2) if generation_seconds else 0.0,
+        # Packed prompts cover several chunks, so the rate is per chunk, not per request
+        "summary_cache_hit_rate": round(cached / summarized, 3) if summarized else 0.0,
+    }
+
+# The shared registry used across the app
+METRICS = MetricsRegistry()
@@ -1,23 +1,83 @@
 # src/models.py
-from pydantic import BaseModel, Field
-from typing import List, Optional, Any
-
-class CodeFile(BaseModel):
-    file_path: str
-    language: str
-    content: str
-    file_hash: str
-    loc: int
-
-class CodeChunk(BaseModel):
-    chunk_id: str
-    chunk_type: str = Field(..., description="class, method, function, or module")
-    file_path: str
-    start_line: int
-    end_line: int
-    code: str
-    # Metadata for context
-    parent: Optional[str] = None
-    imports: List[str] = []
-    # We will fill this later with AI
-    summary: Optional[str] = None
\ No newline at end of file
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+# Internal records for the ingest path. They are plain __slots__ classes,
+# not pydantic models: a large ingest holds hundreds of thousands of chunks,
+# and validation plus a per-instance __dict__ showed up in both time and
+# memory. Request/response schemas in server.py stay pydantic.
+
+class CodeFile:
+    """A source file as read from disk; its chunks slice their code out of `content`."""
+    __slots__ = ("file_path", "language", "content", "file_hash", "loc", "_line_starts")
+
+    def __init__(self, file_path: str, language: str, content: str, file_hash: str, loc: int):
+        self.file_path = file_path
+        self.language = language
+        self.content = content
+        self.file_hash = file_hash
+        self.loc = loc
+        self._line_starts: Optional[List[int]] = None
+
+    def __reduce__(self):
+        # Line offsets are cheap to rebuild; don't ship them between processes
+        return CodeFile, (self.file_path, self.language, self.content, self.file_hash, self.loc)
+
+    def line_starts(self) -> List[int]:
+        """Offset of the first character of each line (1-based line n starts at [n - 1])."""
+        if self._line_starts is None:
+            starts = [0]
+            content = self.content
+            find = content.find
+            pos = find("\n")
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = find("\n", pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_range(self, start_line: int, end_line: int) -> str:
+        """Text of lines start_line..end_line (1-based, inclusive) without the final newline."""
+        starts = self.line_starts()
+        begin = starts[start_line - 1]
+        end = starts[end_line] - 1 if end_line < len(starts) else len(self.content)
+        text = self.content[begin:end]
+        # Same text as joining splitlines(): no carriage returns
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").rstrip("\r")
+        return text
+
+def intern_imports(names: Iterable[str]) -> Tuple[str, ...]:
+    """An immutable import list with interned names, shareable by every chunk of a file."""
+    return tuple(sys.intern(name) for name in names)
+
+class CodeChunk:
+    """
+    One class, method or function. Holds line numbers into its file instead
+    of a copy of the code, and shares the file's import tuple.
+    """
+    __slots__ = ("chunk_id", "chunk_type", "file", "start_line", "end_line", "parent", "imports", "summary")
+
+    def __init__(self, chunk_id: str, chunk_type: str, file: CodeFile, start_line: int, end_line: int,
+                 parent: Optional[str] = None, imports: Tuple[str, ...] = (), summary: Optional[str] = None):
+        self.chunk_id = chunk_id
+        self.chunk_type = chunk_type  # class, method, function, or module
+        self.file = file
+        self.start_line = start_line
+        self.end_line = end_line
+        # Metadata for context
+        self.parent = parent
+        self.imports = imports
+        # We will fill this later with AI
+        self.summary = summary
+
+    @property
+    def file_path(self) -> str:
+        return self.file.file_path
+
+    @property
+    def code(self) -> str:
+        return self.file.line_range(self.start_line, self.end_line)
+
+    def __repr__(self) -> str:
+        return f"CodeChunk({self.file_path}:{self.chunk_id}, lines {self.start_line}-{self.end_line})"
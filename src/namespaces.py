@@ -0,0 +1,69 @@
+# src/namespaces.py
+import hashlib
+import os
+import re
+from typing import Dict, Optional
+
+# Repository names become part of Chroma collection names and ids
+_REPO_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,49}$")
+COLLECTION_PREFIX = "repo_"
+
+def repo_name(repo_path: str) -> str:
+    """
+    Default namespace for a repository: its directory name, made id-safe,
+    plus a short hash of its absolute path, so two checkouts with the same
+    directory name (/a/backend, /b/backend) never share a namespace.
+    """
+    full_path = os.path.normcase(os.path.normpath(os.path.abspath(repo_path)))
+    base = re.sub(r"[^A-Za-z0-9_-]", "_", os.path.basename(full_path)).strip("_-")[:41]
+    digest = hashlib.sha256(full_path.encode("utf-8")).hexdigest()[:8]
+    return f"{base or 'repo'}-{digest}"
+
+def validate_repo_name(name: str) -> str:
+    if not _REPO_NAME_RE.match(name):
+        raise ValueError(
+            f"Invalid repository name {name!r}: use 1-50 letters, digits, '_' or '-', starting with a letter or digit"
+        )
+    return name
+
+def collection_name(repo: str) -> str:
+    """Chroma collection holding one repository's chunks."""
+    name = f"{COLLECTION_PREFIX}{repo}"
+    # Chroma names must end in a letter or digit
+    if not name[-1].isalnum():
+        name += hashlib.sha256(repo.encode("utf-8")).hexdigest()[:6]
+    return name
+
+def normalize_path(file_path: str) -> str:
+    return file_path.replace("\\", "/").strip("/")
+
+def document_id(repo: str, file_path: str, chunk_id: str) -> str:
+    """
+    Stable id of a chunk across repositories: repo + path + qualified name,
+    e.g. "pong:game/ball.py:Ball.move".
+    """
+    return f"{repo}:{normalize_path(file_path)}:{chunk_id}"
+
+def path_prefix_metadata(file_path: str) -> Dict[str, str]:
+    """
+    Every leading part of the path as its own metadata field
+    ("a/b/c.py" -> path_0="a", path_1="a/b", path_2="a/b/c.py"), so a
+    path-prefix filter becomes an exact match on one field.
+    """
+    parts = normalize_path(file_path).split("/")
+    return {f"path_{i}": "/".join(parts[:i + 1]) for i in range(len(parts))}
+
+def build_where(path_prefix: Optional[str] = None, chunk_type: Optional[str] = None) -> Optional[dict]:
+    """
+    Chroma `where` clause for /search filters. Path prefixes match whole
+    components: "src/app" matches "src/app/x.py" but not "src/apple.py".
+    """
+    clauses = []
+    if path_prefix and normalize_path(path_prefix):
+        prefix = normalize_path(path_prefix)
+        clauses.append({f"path_{prefix.count('/')}": prefix})
+    if chunk_type:
+        clauses.append({"type": chunk_type})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,106 @@
+# src/packing.py
+import ast
+import textwrap
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .chunker import parse_python
+from .models import CodeChunk
+
+# Small sibling chunks (same file and class) share one summarization prompt.
+# Sizes are in characters of code as sent (~4 chars per token).
+PACK_ENABLED = True
+PACK_SMALL_CHUNK_CHARS = 1500
+PACK_MAX_CHARS = 6000
+PACK_MAX_SYMBOLS = 8
+# Classes are summarized from their signatures; methods get their own chunks anyway
+CLASS_SKELETONS = True
+
+PackedChunk = Tuple[CodeChunk, str]
+
+def class_skeleton(code: str) -> str:
+    """
+    Reduces a class to its header, attributes and method signatures:
+    every multi-line method body becomes "...". Docstrings are kept.
+    Returns the code unchanged if it can't be parsed.
+    """
+    source = textwrap.dedent(code)
+    try:
+        tree = parse_python(source)
+    except SyntaxError:
+        return code
+    if not tree.body or not isinstance(tree.body[0], ast.ClassDef):
+        return code
+
+    # Split the way ast counts lines; str.splitlines also breaks on form feeds and the like
+    lines = source.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    # 0-based first line of a body to elide -> its last line
+    elided: Dict[int, int] = {}
+
+    stack = [tree.body[0]]
+    while stack:
+        node = stack.pop()
+        for child in node.body:
+            if isinstance(child, ast.ClassDef):
+                stack.append(child)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                body = child.body[1:] if ast.get_docstring(child, clean=False) is not None else child.body
+                # One-line bodies (def f(self): return x) are already as short as they get
+                if body and body[0].lineno > child.lineno:
+                    elided[body[0].lineno - 1] = child.end_lineno - 1
+
+    output = []
+    i = 0
+    while i < len(lines):
+        if i in elided:
+            indent = lines[i][:len(lines[i]) - len(lines[i].lstrip())]
+            output.append(f"{indent}...")
+            i = elided[i] + 1
+        else:
+            output.append(lines[i])
+            i += 1
+    return "\n".join(output)
+
+def prompt_code(chunk: CodeChunk) -> str:
+    """The code that is actually sent to the model for a chunk."""
+    if CLASS_SKELETONS and chunk.chunk_type == "class":
+        return class_skeleton(chunk.code)
+    return chunk.code
+
+def pack_chunks(chunks: Iterable[CodeChunk], small_chars: int = PACK_SMALL_CHUNK_CHARS,
+                max_chars: int = PACK_MAX_CHARS, max_symbols: int = PACK_MAX_SYMBOLS) -> Iterator[List[PackedChunk]]:
+    """
+    Groups chunks into prompts as (chunk, prompt code) lists.
+    Small chunks are packed with siblings (same file and parent) up to
+    max_chars / max_symbols; larger ones go alone. Expects chunks in file
+    order, as the chunker produces them: open groups are flushed whenever a
+    new file starts, so the input can be a stream.
+    """
+    open_groups: Dict[Tuple[str, Optional[str]], List[PackedChunk]] = {}
+    sizes: Dict[Tuple[str, Optional[str]], int] = {}
+    current_file = None
+
+    for chunk in chunks:
+        if chunk.file_path != current_file:
+            yield from open_groups.values()
+            open_groups.clear()
+            sizes.clear()
+            current_file = chunk.file_path
+
+        code = prompt_code(chunk)
+        if not PACK_ENABLED or len(code) > small_chars:
+            yield [(chunk, code)]
+            continue
+
+        key = (chunk.file_path, chunk.parent)
+        group = open_groups.get(key)
+        # Summaries come back keyed by name, so a name may appear once per prompt
+        if group and (len(group) >= max_symbols or sizes[key] + len(code) > max_chars
+                      or any(other.chunk_id == chunk.chunk_id for other, _ in group)):
+            yield open_groups.pop(key)
+            group = None
+        if group is None:
+            group = open_groups[key] = []
+            sizes[key] = 0
+        group.append((chunk, code))
+        sizes[key] += len(code)
+
+    yield from open_groups.values()
@@ -0,0 +1,467 @@
+# src/pipeline.py
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from .checkpoint import IngestCheckpoint
+from .ingest import scan_and_chunk, hash_file
+from .manifest import IngestManifest
+from .metrics import METRICS, summarize_since
+from .namespaces import document_id, repo_name
+from .models import CodeChunk
+from .writer import inject_docstrings, FileChangedError, WRITABLE_LANGUAGES, WRITE_WORKERS
+
+# Bounded queues between stages cap how many chunks are held in memory at once
+STAGE_QUEUE_SIZE = 256
+# How long the embed stage waits to fill a batch before sending a partial one
+EMBED_LINGER_SECONDS = 0.2
+# Save the manifest every N finished files so progress survives an interrupted run
+MANIFEST_SAVE_EVERY = 50
+
+_DONE = object()
+
+def _format_report(report: dict) -> str:
+    """One-line human summary of an ingest's metrics report."""
+    stages = ", ".join(
+        f"{name} p50 {stats['p50_seconds'] * 1000:.0f}ms / p99 {stats['p99_seconds'] * 1000:.0f}ms"
+        for name, stats in report["stages"].items()
+    )
+    return (
+        f"Took {report['elapsed_seconds']:.1f}s, {report['chunks_per_second']:.1f} chunks/s, "
+        f"{report['llm_tokens_per_second']:.1f} LLM tokens/s, "
+        f"summary cache hit rate {report['summary_cache_hit_rate']:.0%}. {stages}"
+    )
+
+class _FileState:
+    """Tracks a changed file until all of its chunks have been processed."""
+    __slots__ = ("file_path", "file_hash", "language", "chunks", "remaining", "failed", "written")
+
+    def __init__(self, file_path: str, file_hash: str, language: str, remaining: int):
+        self.file_path = file_path
+        self.file_hash = file_hash
+        self.language = language
+        self.chunks: List[CodeChunk] = []
+        self.remaining = remaining
+        # Chunks left without a summary or, with a store, without an upsert
+        self.failed = 0
+        # Already written back by an interrupted run (file_hash is the post-write hash)
+        self.written = False
+
+class IngestPipeline:
+    """
+    Streaming ingest: Scan -> Chunk -> Summarize -> Embed -> Upsert -> Write Docs.
+    Each stage runs in its own thread and hands work to the next through a
+    bounded queue, so memory stays flat and chunks become searchable as soon
+    as their batch is upserted. A file is written back (and recorded in the
+    manifest) once all of its chunks are through; a file with a chunk that
+    failed is left out of both, so the next ingest redoes it.
+
+    The store is one repository's namespace (VectorStore.repo(name)).
+    Without a store, chunks are only summarized and written back (the CLI flow),
+    so files in languages that can't be written back are not summarized.
+
+    With a checkpoint, every summary, upsert and write-back is recorded as it
+    happens; a run with resume=True skips whatever an interrupted run already
+    did, otherwise the old checkpoint is discarded.
+    """
+    def __init__(self, repo_path: str, store=None, manifest: Optional[IngestManifest] = None,
+                 write_back: bool = True, batch_size: Optional[int] = None,
+                 queue_size: int = STAGE_QUEUE_SIZE,
+                 checkpoint: Optional[IngestCheckpoint] = None, resume: bool = False):
+        from .ai_engine import EMBED_BATCH_SIZE
+
+        self.repo_path = repo_path
+        self.store = store
+        self.repo = store.repo if store is not None else repo_name(repo_path)
+        self.manifest = manifest
+        self.write_back = write_back
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.batch_size = batch_size or EMBED_BATCH_SIZE
+        self.stop = threading.Event()
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+
+        self._summarize_q = queue.Queue(maxsize=queue_size)
+        self._embed_q = queue.Queue(maxsize=queue_size)
+        self._upsert_q = queue.Queue(maxsize=max(1, queue_size // self.batch_size))
+        self._finish_q = queue.Queue(maxsize=queue_size)
+        self._events = queue.Queue()
+
+        # Guards _files, the manifest and the counters, which several stages touch
+        self._lock = threading.Lock()
+        self._files: Dict[str, _FileState] = {}
+        # Recorded in the manifest since its last save; their checkpoint rows go once it is saved
+        self._unsaved: List[str] = []
+        self.counts = {
+            "files_reprocessed": 0,
+            "files_skipped": 0,
+            "files_removed": 0,
+            "chunks": 0,
+            "chunks_indexed": 0,
+            "chunks_resumed": 0,
+            "files_written": 0,
+            "files_incomplete": 0
+        }
+
+    def run(self) -> Iterator[dict]:
+        """Runs the pipeline, yielding NDJSON-ready progress events."""
+        stages = [self._scan_stage, self._summarize_stage]
+        if self.store is not None:
+            stages += [self._embed_stage, self._upsert_stage]
+        stages.append(self._finish_stage)
+
+        threads = [threading.Thread(target=self._run_stage, args=(stage,), daemon=True) for stage in stages]
+
+        before = METRICS.snapshot()
+        started = time.perf_counter()
+
+        yield {"status": "starting", "message": "Phase 1: Scanning, chunking and indexing files..."}
+        if self.checkpoint is not None:
+            from .ai_engine import GEN_MODEL, PROMPT_VERSION
+
+            saved = self.checkpoint.begin(f"{GEN_MODEL}:{PROMPT_VERSION}", self.resume)
+            if self.resume and any(saved.values()):
+                yield {
+                    "status": "processing",
+                    "message": f"Resuming: {saved['chunks_summarized']} chunks summarized, {saved['chunks_indexed']} indexed "
+                               f"and {saved['files_written']} files written by the interrupted run.",
+                    "checkpoint": saved
+                }
+            elif self.resume:
+                yield {"status": "processing", "message": "Nothing to resume; starting a normal ingest."}
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(t.is_alive() for t in threads) or not self._events.empty():
+                self._record_queue_depths()
+                try:
+                    yield self._events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+            self._record_queue_depths()
+            if self.error is not None:
+                raise self.error
+            # Everything is in the manifest now; an error, a cancel or a file with
+            # failed chunks keeps the checkpoint for a resume
+            if self.checkpoint is not None and not self.cancelled and not self.counts["files_incomplete"]:
+                self.checkpoint.clear()
+
+            report = summarize_since(before, time.perf_counter() - started)
+            yield {"status": "summary", "message": _format_report(report), "metrics": report}
+
+            if self.cancelled:
+                yield {"status": "cancelled", "message": "Ingestion cancelled. Finished files are kept; resume to continue.",
+                       **self.counts}
+            elif self.counts["files_incomplete"]:
+                yield {"status": "complete",
+                       "message": f"Ingestion finished, but {self.counts['files_incomplete']} files had chunks that could "
+                                  f"not be summarized or indexed; the next ingest retries them.",
+                       **self.counts}
+            else:
+                yield {"status": "complete", "message": "Ingestion & Documentation Complete!", **self.counts}
+        finally:
+            # Also reached when the consumer goes away early: wind the stages down
+            self.stop.set()
+
+    def cancel(self):
+        """
+        Stops all stages. Files that were already written back stay recorded
+        in the manifest; everything else is picked up by the next ingest, and
+        a resumed one reuses the checkpointed summaries and upserts.
+        """
+        self.cancelled = True
+        self.stop.set()
+
+    # --- Plumbing ---
+
+    def _run_stage(self, stage):
+        try:
+            stage()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+            self.stop.set()
+
+    def _record_queue_depths(self):
+        for name, q in (("summarize", self._summarize_q), ("embed", self._embed_q),
+                        ("upsert", self._upsert_q), ("finish", self._finish_q)):
+            METRICS.set_gauge("ingest_queue_depth", q.qsize(), queue=name)
+
+    def _emit(self, message: str):
+        self._events.put({"status": "processing", "message": message})
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # Blocks while the next stage is behind (backpressure), but gives up on stop
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue, timeout: Optional[float] = None):
+        waited = 0.0
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                waited += 0.1
+                if timeout is not None and waited >= timeout:
+                    return None
+        return _DONE
+
+    def _queue_items(self, q: queue.Queue) -> Iterator:
+        while True:
+            item = self._get(q)
+            if item is _DONE:
+                return
+            yield item
+
+    def _document_ids(self, chunks: List[CodeChunk]) -> List[str]:
+        return [document_id(self.repo, chunk.file_path, chunk.chunk_id) for chunk in chunks]
+
+    def _chunk_done(self, chunk: CodeChunk, ok: bool = True):
+        with self._lock:
+            state = self._files[chunk.file_path]
+            state.chunks.append(chunk)
+            state.remaining -= 1
+            if not ok:
+                state.failed += 1
+            ready = state.remaining == 0
+        if ready:
+            self._put(self._finish_q, state)
+
+    # --- Stages ---
+
+    def _scan_stage(self):
+        known_hashes = self.manifest.known_hashes() if self.manifest else {}
+        seen = set()
+        unreadable: List[str] = []
+
+        for file, chunks in scan_and_chunk(self.repo_path, known_hashes, unreadable=unreadable):
+            if self.stop.is_set():
+                return
+            seen.add(file.file_path)
+            if chunks is None:
+                with self._lock:
+                    self.counts["files_skipped"] += 1
+                continue
+
+            state = _FileState(file.file_path, file.file_hash, file.language, len(chunks))
+            with self._lock:
+                self.counts["files_reprocessed"] += 1
+                self.counts["chunks"] += len(chunks)
+                self._files[file.file_path] = state
+                stale = self.manifest.stale_chunk_ids(file.file_path, self._document_ids(chunks)) if self.manifest else []
+
+            # Symbols that were deleted from the file since the last ingest
+            if self.store is not None and stale:
+                self.store.delete_chunks(stale)
+
+            # Without a store, a summary of a file we can't write back would be thrown away
+            if not chunks or (self.store is None and file.language not in WRITABLE_LANGUAGES):
+                self._put(self._finish_q, state)
+                continue
+
+            self._emit(f"Chunked {file.file_path} ({len(chunks)} chunks)")
+            pending = self._resume_file(state, chunks) if self.checkpoint is not None and self.resume else chunks
+            if pending is None:
+                return
+            for chunk in pending:
+                if not self._put(self._summarize_q, chunk):
+                    return
+
+        # A file that failed to read this time still exists: keep its chunks and manifest entry
+        seen.update(unreadable)
+
+        # Drop everything we know about files that no longer exist
+        if self.manifest:
+            with self._lock:
+                removed = self.manifest.removed(seen)
+                removed_ids = [cid for path in removed for cid in self.manifest.forget(path)]
+                self.counts["files_removed"] = len(removed)
+            if self.store is not None:
+                self.store.delete_chunks(removed_ids)
+
+        message = (
+            f"Found {len(seen)} files: {self.counts['files_reprocessed']} new or changed, "
+            f"{self.counts['files_skipped']} unchanged (skipped), {self.counts['files_removed']} removed."
+        )
+        if unreadable:
+            message += f" {len(unreadable)} could not be read; their previous index entries are kept."
+        self._emit(message)
+        self._put(self._summarize_q, _DONE)
+
+    def _resume_file(self, state: _FileState, chunks: List[CodeChunk]) -> Optional[List[CodeChunk]]:
+        """
+        Sends chunks the checkpoint already has further down the pipeline.
+        Returns the ones that still need a summary (None if stopped).
+        """
+        state.written = self.checkpoint.was_written(state.file_path, state.file_hash)
+        saved = {} if state.written else self.checkpoint.load(state.file_path, state.file_hash)
+
+        pending, summarized, done = [], [], []
+        for chunk in chunks:
+            entry = saved.get(chunk.chunk_id)
+            if state.written:
+                done.append(chunk)
+            elif entry is None:
+                pending.append(chunk)
+            else:
+                chunk.summary, upserted = entry
+                (done if upserted or self.store is None else summarized).append(chunk)
+
+        resumed = len(chunks) - len(pending)
+        if not resumed:
+            return pending
+        with self._lock:
+            self.counts["chunks_resumed"] += resumed
+        self._emit(f"Resumed {state.file_path}: {resumed} of {len(chunks)} chunks were already done")
+
+        if self.store is not None and done:
+            self.store.restore_lexical(done)
+        for chunk in summarized:
+            if not self._put(self._embed_q, chunk):
+                return None
+        for chunk in done:
+            self._chunk_done(chunk)
+        return pending
+
+    def _summarize_stage(self):
+        from .ai_engine import summarize_chunks, SUMMARY_FAILED
+
+        # Summaries run on the bounded worker pool, pulling from the queue as slots free up
+        for chunk, summary in summarize_chunks(self._queue_items(self._summarize_q)):
+            chunk.summary = summary
+            if summary == SUMMARY_FAILED:
+                # Nothing to embed or write back; the file is redone by the next ingest
+                self._chunk_done(chunk, ok=False)
+                continue
+            if self.checkpoint is not None:
+                self.checkpoint.record_summaries([chunk])
+            if self.store is not None:
+                self._put(self._embed_q, chunk)
+            else:
+                self._chunk_done(chunk)
+
+        next_q = self._embed_q if self.store is not None else self._finish_q
+        self._put(next_q, _DONE)
+
+    def _embed_stage(self):
+        from .ai_engine import get_embeddings
+        from .vector_store import build_embed_text
+
+        done = False
+        while not done:
+            item = self._get(self._embed_q)
+            if item is _DONE:
+                break
+
+            # Fill the batch with whatever arrives shortly, then send it
+            batch = [item]
+            while len(batch) < self.batch_size:
+                item = self._get(self._embed_q, timeout=EMBED_LINGER_SECONDS)
+                if item is None:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            embed_texts = [build_embed_text(chunk) for chunk in batch]
+            vectors = get_embeddings(embed_texts)
+            if not self._put(self._upsert_q, (batch, embed_texts, vectors)):
+                return
+
+        self._put(self._upsert_q, _DONE)
+
+    def _upsert_stage(self):
+        try:
+            for batch, embed_texts, vectors in self._queue_items(self._upsert_q):
+                indexed = self.store.upsert_chunks(batch, embed_texts, vectors)
+                if self.checkpoint is not None:
+                    # Chunks whose embedding failed were not upserted
+                    self.checkpoint.record_upserted([chunk for chunk, vector in zip(batch, vectors) if vector])
+                with self._lock:
+                    self.counts["chunks_indexed"] += indexed
+                self._emit(f"Analyzed & Indexed {self.counts['chunks_indexed']} of {self.counts['chunks']} chunks so far...")
+
+                for chunk, vector in zip(batch, vectors):
+                    self._chunk_done(chunk, bool(vector))
+        finally:
+            self.store.flush()
+
+        self._put(self._finish_q, _DONE)
+
+    def _write_file(self, state: _FileState) -> Optional[str]:
+        """
+        Writes one file's docstrings. Returns the hash to record in the
+        manifest, or None if the file has to be redone: a chunk failed, or
+        the file was edited since it was scanned.
+        """
+        if state.failed:
+            # Writing now would leave the failed chunks undocumented for good
+            with self._lock:
+                self.counts["files_incomplete"] += 1
+            self._emit(f"Skipped {state.file_path}: {state.failed} of {len(state.chunks)} chunks failed; "
+                       f"the next ingest retries it")
+            return None
+
+        if state.written or not (self.write_back and state.chunks and state.language in WRITABLE_LANGUAGES):
+            return state.file_hash
+
+        full_path = os.path.join(self.repo_path, state.file_path)
+        self._emit(f"Updating {os.path.basename(full_path)}...")
+
+        # This is where the file modification happens
+        try:
+            with METRICS.timed("write_back"):
+                written = inject_docstrings(full_path, state.chunks, expected_hash=state.file_hash)
+            METRICS.inc("ingest_items_total", stage="write_back")
+        except FileChangedError as e:
+            self._emit(f"Skipped {state.file_path}: {e}")
+            return None
+
+        if not written:
+            return state.file_hash
+        with self._lock:
+            self.counts["files_written"] += 1
+        # Record the post-write hash so our own edits don't look like changes
+        written_hash = hash_file(full_path)
+        if self.checkpoint is not None:
+            self.checkpoint.record_written(state.file_path, written_hash)
+        return written_hash
+
+    def _finish_stage(self):
+        from .ai_engine import run_concurrently
+
+        finished = 0
+        # Files are written back in parallel as soon as their last chunk is done
+        for state, file_hash in run_concurrently(self._write_file, self._queue_items(self._finish_q),
+                                                 max_workers=WRITE_WORKERS):
+            with self._lock:
+                self._files.pop(state.file_path, None)
+                # Files edited under us or with failed chunks stay out of the manifest so the next ingest redoes them
+                if self.manifest and file_hash is not None:
+                    self.manifest.record(state.file_path, file_hash, self._document_ids(state.chunks))
+                    self._unsaved.append(state.file_path)
+                    finished += 1
+                    if finished % MANIFEST_SAVE_EVERY == 0:
+                        self._save_manifest()
+
+        if self.manifest:
+            with self._lock:
+                self._save_manifest()
+
+    def _save_manifest(self):
+        # Called with _lock held
+        self.manifest.save()
+        if self.checkpoint is not None:
+            self.checkpoint.forget(self._unsaved)
+        self._unsaved = []
@@ -1,96 +1,229 @@
 # src/server.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+import asyncio
 import json
 import os
-from collections import defaultdict
+import threading
+from typing import List, Optional
 
-# Import all your modules
-from .ingest import scan_repository
-from .chunker import chunk_file
-from .vector_store import VectorStore
-from .writer import inject_docstrings  # <--- CRITICAL IMPORT
+# Light modules only: the pipeline, model client and vector store (chromadb,
+# numpy, requests) are imported by the handlers that use them
+from .http_client import CircuitOpenError
+from .jobs import IngestJob, JobManager
+from .metrics import METRICS
+from .namespaces import repo_name, validate_repo_name
 
-app = FastAPI()
-db = VectorStore()
+# How often a streaming /ingest response checks its job for new events
+JOB_POLL_SECONDS = 0.25
+# Open the vector store while the app starts instead of on the first request
+OPEN_STORE_ON_STARTUP = True
+
+db = None
+_db_lock = threading.Lock()
+jobs = JobManager()
+
+def get_db():
+    """The shared VectorStore, opened on first use."""
+    global db
+    with _db_lock:
+        if db is None:
+            from .vector_store import VectorStore
+            db = VectorStore()
+    return db
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if OPEN_STORE_ON_STARTUP:
+        await run_in_threadpool(get_db)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 class RepoRequest(BaseModel):
     path: str
+    # Namespace to index into; defaults to the directory name plus a hash of the absolute path
+    repo: Optional[str] = None
+    # Return the job id right away instead of streaming progress
+    detach: bool = False
+    # Continue an interrupted or cancelled ingest from its checkpoint
+    # instead of discarding the work it had not yet saved to the manifest
+    resume: bool = False
 
 class QueryRequest(BaseModel):
     query: str
+    # Optional filters; without repo, every indexed repository is searched
+    repo: Optional[str] = None
+    path_prefix: Optional[str] = None
+    chunk_type: Optional[str] = None
+    n_results: int = Field(3, ge=1, le=50)
 
-async def ingest_stream(path: str):
+def make_pipeline(path: str, repo: str, resume: bool = False):
     """
     Full pipeline: Scan -> Chunk -> Index -> Write Docs to Disk
+    Stages stream into each other, so chunks are searchable while the ingest runs.
+    Only files that are new or changed since the last ingest are reprocessed.
+    Each repository is indexed into its own namespace with its own manifest
+    and checkpoint. Raises ValueError if the namespace belongs to another path.
     """
-    try:
-        # --- PHASE 1: Scan & Chunk ---
-        yield json.dumps({"status": "starting", "message": "Phase 1: Scanning files..."}) + "\n"
-        
-        files = scan_repository(path)
-        yield json.dumps({"status": "processing", "message": f"Found {len(files)} files."}) + "\n"
-        
-        all_chunks = []
-        for file in files:
-            if file.language == 'python':
-                chunks = chunk_file(file)
-                all_chunks.extend(chunks)
-                yield json.dumps({"status": "processing", "message": f"Chunked {file.file_path} ({len(chunks)} chunks)"}) + "\n"
-
-        # --- PHASE 2 & 3: AI Analysis & Indexing ---
-        # Note: db.add_chunks() modifies the 'chunks' list in-place by adding summaries
-        yield json.dumps({"status": "processing", "message": f"Phase 2: AI Analysis & Indexing ({len(all_chunks)} chunks)..."}) + "\n"
-        
-        # We process in batches to show progress
-        batch_size = 5
-        total = len(all_chunks)
-        
-        for i in range(0, total, batch_size):
-            batch = all_chunks[i : i + batch_size]
-            db.add_chunks(batch) # This generates the summaries!
-            yield json.dumps({"status": "processing", "message": f"Analyzed & Indexed chunks {i} to {min(i+batch_size, total)}..."}) + "\n"
-
-        # --- PHASE 4: Write Back to Disk ---
-        yield json.dumps({"status": "processing", "message": "Phase 3: Writing Docstrings to Files..."}) + "\n"
-        
-        # Group chunks by their FULL file path so we can open the file once
-        file_chunks_map = defaultdict(list)
-        for chunk in all_chunks:
-            # Construct full system path
-            full_path = os.path.join(path, chunk.file_path)
-            file_chunks_map[full_path].append(chunk)
-            
-        # Iterate over files and inject
-        for file_path, chunks in file_chunks_map.items():
-            file_name = os.path.basename(file_path)
-            yield json.dumps({"status": "processing", "message": f"Updating {file_name}..."}) + "\n"
-            
-            # This is where the file modification happens
-            inject_docstrings(file_path, chunks)
-
-        yield json.dumps({"status": "complete", "message": "Ingestion & Documentation Complete!"}) + "\n"
+    from .checkpoint import IngestCheckpoint
+    from .manifest import IngestManifest, MANIFEST_FILENAME
+    from .pipeline import IngestPipeline
 
-    except Exception as e:
-        yield json.dumps({"status": "error", "message": str(e)}) + "\n"
+    store = get_db()
+    manifest = IngestManifest(os.path.join(store.persist_path, "manifests", f"{repo}.{MANIFEST_FILENAME}"), path)
+    # Ids are repo:path:symbol, so two checkouts in one namespace would overwrite each other
+    owners = manifest.other_repos()
+    if owners:
+        raise ValueError(f"Repository name {repo!r} is already used for {owners[0]}; choose another repo name")
+    checkpoint = IngestCheckpoint(os.path.join(store.persist_path, "checkpoints", f"{repo}.sqlite"))
+    return IngestPipeline(path, store=store.repo(repo), manifest=manifest, checkpoint=checkpoint, resume=resume)
+
+async def ingest_stream(job: IngestJob):
+    """
+    Follows a background ingest job and streams its progress as NDJSON.
+    The job keeps running if the client disconnects.
+    """
+    yield json.dumps({"status": "starting", "message": f"Started ingest job {job.id}", "job_id": job.id}) + "\n"
+
+    cursor = 0
+    while True:
+        # Read the status first: once finished, every event is already buffered
+        finished = job.finished
+        events, cursor = job.events_since(cursor)
+        for event in events:
+            yield json.dumps(event) + "\n"
+        if finished:
+            break
+        # Poll without tying up a worker thread or the event loop
+        await asyncio.sleep(JOB_POLL_SECONDS)
 
 @app.post("/ingest")
 async def ingest_repo(request: RepoRequest):
     if not os.path.exists(request.path):
         raise HTTPException(status_code=400, detail="Path not found")
-        
-    return StreamingResponse(ingest_stream(request.path), media_type="application/x-ndjson")
 
-@app.post("/search")
-async def search_docs(request: QueryRequest):
-    results = db.search(request.query)
+    try:
+        repo = validate_repo_name(request.repo) if request.repo else repo_name(request.path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Building the pipeline opens the store, manifest, checkpoint and lexical index; keep it off the event loop
+    try:
+        job = await run_in_threadpool(jobs.start, repo, request.path,
+                                      lambda: make_pipeline(request.path, repo, request.resume))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if request.detach:
+        return job.snapshot()
+    return StreamingResponse(ingest_stream(job), media_type="application/x-ndjson")
+
+@app.get("/jobs")
+async def list_jobs():
+    return {"jobs": [job.snapshot() for job in jobs.list()]}
+
+@app.get("/jobs/{job_id}")
+async def job_progress(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.cancel()
+    return job.snapshot()
+
+def format_results(results: dict) -> List[dict]:
+    """Search hits as returned by /search and used as /ask sources."""
     response = []
     if results['documents']:
         for doc, meta in zip(results['documents'][0], results['metadatas'][0]):
             response.append({
                 "content": doc,
+                "repo": meta.get('repo'),
+                "symbol": meta.get('chunk_id'),
+                "type": meta.get('type'),
                 "file": meta['file_path'],
                 "summary": meta['summary']
             })
-    return {"results": response}
\ No newline at end of file
+    return response
+
+async def run_search(request: QueryRequest) -> List[dict]:
+    # Embedding + vector query are blocking; keep them off the event loop
+    try:
+        results = await run_in_threadpool(
+            get_db().search, request.query, request.n_results,
+            request.repo, request.path_prefix, request.chunk_type
+        )
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return format_results(results)
+
+@app.post("/search")
+async def search_docs(request: QueryRequest):
+    return {"results": await run_search(request)}
+
+def answer_stream(question: str, sources: List[dict]):
+    """
+    Streams an answer as NDJSON: the sources first, then one event per
+    token as the model generates it. A plain generator: Starlette iterates
+    it in a worker thread, and closing it (client gone) stops generation.
+    """
+    from .ai_engine import answer_question
+
+    yield json.dumps({"status": "sources", "sources": sources}) + "\n"
+    if not sources:
+        yield json.dumps({"status": "complete", "message": "No relevant documentation found."}) + "\n"
+        return
+
+    try:
+        for text in answer_question(question, sources):
+            yield json.dumps({"status": "token", "text": text}) + "\n"
+    except Exception as e:
+        yield json.dumps({"status": "error", "message": f"Answer generation failed: {e}"}) + "\n"
+        return
+    yield json.dumps({"status": "complete", "message": "Answer complete."}) + "\n"
+
+@app.post("/ask")
+async def ask(request: QueryRequest):
+    """Retrieval-augmented answer: searches like /search, then streams the model's answer."""
+    sources = await run_search(request)
+    return StreamingResponse(answer_stream(request.query, sources), media_type="application/x-ndjson")
+
+@app.get("/repos")
+async def list_repos():
+    """Repositories that have been indexed, usable as the /search repo filter."""
+    return {"repos": await run_in_threadpool(get_db().repos)}
+
+@app.get("/stats")
+async def cache_stats():
+    """Hit rates for the /search caches and the on-disk model cache."""
+    from .ai_engine import cache_stats as model_cache_stats
+
+    return {
+        "search": get_db().cache_stats(),
+        "model_cache": await run_in_threadpool(model_cache_stats)
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: stage latencies, throughput, queue depths and cache hit rates."""
+    from .ai_engine import cache_stats as model_cache_stats
+
+    model_cache = await run_in_threadpool(model_cache_stats)
+    search = get_db().cache_stats()
+    extra = {
+        "model_cache_hit_rate": model_cache.get("hit_rate", 0.0),
+        "model_cache_bytes": model_cache.get("bytes", 0),
+        "search_query_embedding_cache_hit_rate": search["query_embeddings"]["hit_rate"],
+        "search_result_cache_hit_rate": search["results"]["hit_rate"]
+    }
+    return PlainTextResponse(METRICS.render(extra_gauges=extra), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,398 @@
+# src/storage.py
+import abc
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+from .namespaces import COLLECTION_PREFIX, collection_name
+
+# Rows scored per matrix multiply in the memmap backend; bounds the temporary memory of a query
+MEMMAP_QUERY_BLOCK_ROWS = 65536
+# Compact the vector file on flush once this fraction of its rows are deleted
+MEMMAP_COMPACT_RATIO = 0.25
+# Row sets of recent `where` filters, reused until the collection changes
+MEMMAP_FILTER_CACHE_SIZE = 64
+
+_METADATA_KEY_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+class CollectionBackend(abc.ABC):
+    """
+    Vectors, documents and metadata of one repository namespace.
+    get() and query() return flat {"ids", "documents", "metadatas"} lists;
+    `where` uses Chroma's syntax (field equality, $eq, $and, $or).
+    """
+    @abc.abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[dict]):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, ids: List[str]):
+        ...
+
+    @abc.abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None,
+            limit: Optional[int] = None, offset: int = 0) -> dict:
+        ...
+
+    @abc.abstractmethod
+    def query(self, embedding: List[float], n_results: int, where: Optional[dict] = None) -> dict:
+        """Nearest neighbours first."""
+        ...
+
+    def flush(self):
+        """Called at the end of an ingest."""
+
+class StorageBackend(abc.ABC):
+    """Opens the per-repository collections of a VectorStore."""
+    @abc.abstractmethod
+    def open_collection(self, repo: str) -> CollectionBackend:
+        ...
+
+    @abc.abstractmethod
+    def list_repos(self) -> List[str]:
+        ...
+
+# --- Chroma ---
+
+class ChromaCollection(CollectionBackend):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids):
+        self.collection.delete(ids=list(ids))
+
+    def get(self, ids=None, where=None, limit=None, offset=0):
+        page = self.collection.get(ids=ids, where=where, limit=limit, offset=offset or None,
+                                   include=["documents", "metadatas"])
+        return {"ids": page['ids'], "documents": page['documents'], "metadatas": page['metadatas']}
+
+    def query(self, embedding, n_results, where=None):
+        dense = self.collection.query(query_embeddings=[embedding], n_results=n_results, where=where)
+        return {"ids": dense['ids'][0], "documents": dense['documents'][0], "metadatas": dense['metadatas'][0]}
+
+class ChromaBackend(StorageBackend):
+    """chromadb.PersistentClient, one collection per repository."""
+    def __init__(self, persist_path: str):
+        import chromadb  # heavy; only paid for when this backend is used
+        self.client = chromadb.PersistentClient(path=persist_path)
+
+    def open_collection(self, repo: str) -> ChromaCollection:
+        return ChromaCollection(self.client.get_or_create_collection(name=collection_name(repo), metadata={"repo": repo}))
+
+    def list_repos(self) -> List[str]:
+        names = []
+        for collection in self.client.list_collections():
+            if collection.name.startswith(COLLECTION_PREFIX) and (collection.metadata or {}).get("repo"):
+                names.append(collection.metadata["repo"])
+        return sorted(names)
+
+# --- Memory-mapped NumPy ---
+
+def _where_sql(where: Optional[dict], params: list) -> str:
+    """Translates a Chroma-style where clause to SQL over the JSON metadata column."""
+    if not where:
+        return "1"
+    clauses = []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(_where_sql(sub, params) for sub in value) + ")")
+            continue
+        if not _METADATA_KEY_RE.match(key):
+            raise ValueError(f"Unsupported metadata field {key!r}")
+        if isinstance(value, dict):
+            if set(value) != {"$eq"}:
+                raise ValueError(f"Only equality filters are supported, got {value}")
+            value = value["$eq"]
+        clauses.append(f"json_extract(metadata, '$.{key}') = ?")
+        params.append(value)
+    return " AND ".join(clauses)
+
+class MemmapCollection(CollectionBackend):
+    """
+    Embeddings as one contiguous float32 matrix in a memory-mapped file
+    (vectors.f32, unit-normalized so a dot product is cosine similarity),
+    plus a SQLite sidecar (meta.sqlite) mapping row -> id, document and
+    metadata. Queries are an exact blockwise NumPy top-k.
+
+    Deleted rows are blanked with NaN and reclaimed by compaction on
+    flush. Any number of processes can open the same directory with
+    read_only=True; they remap the file when a writer grows or compacts it.
+    """
+    def __init__(self, directory: str, repo: str, read_only: bool = False):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("The memmap storage backend requires numpy (pip install numpy)")
+        self._np = np
+        self.repo = repo
+        self.read_only = read_only
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        meta_path = os.path.join(directory, "meta.sqlite")
+        self._lock = threading.RLock()
+
+        if read_only:
+            self._db = sqlite3.connect(f"file:{meta_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(meta_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS chunks (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute("INSERT OR IGNORE INTO info VALUES ('repo', ?)", (repo,))
+            self._db.commit()
+
+        self.dim: Optional[int] = None
+        self._matrix = None
+        self._mapped = None  # (inode, size) of the mapped file
+        self._writes = 0
+        self._filter_rows: Dict[str, tuple] = {}
+
+    # --- Helpers ---
+
+    def _load_dim(self) -> Optional[int]:
+        if self.dim is None:
+            row = self._db.execute("SELECT value FROM info WHERE key = 'dim'").fetchone()
+            self.dim = int(row[0]) if row else None
+        return self.dim
+
+    def _refresh(self):
+        """(Re)maps the vector file if it changed since we last looked."""
+        try:
+            stat = os.stat(self.vectors_path)
+        except FileNotFoundError:
+            self._matrix, self._mapped = None, None
+            return
+        if self._mapped == (stat.st_ino, stat.st_size):
+            return
+        dim = self._load_dim()
+        rows = stat.st_size // (4 * dim) if dim else 0
+        self._matrix = self._np.memmap(self.vectors_path, dtype=self._np.float32, mode='r', shape=(rows, dim)) if rows else None
+        self._mapped = (stat.st_ino, stat.st_size)
+
+    def _total_rows(self) -> int:
+        dim = self._load_dim()
+        if not dim or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * dim)
+
+    def _rows_for(self, ids: Sequence[str]) -> Dict[str, int]:
+        found = {}
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            marks = ",".join("?" * len(batch))
+            found.update(self._db.execute(f"SELECT id, row FROM chunks WHERE id IN ({marks})", batch).fetchall())
+        return found
+
+    def _rows_matching(self, where: dict):
+        """
+        Sorted rows whose metadata matches `where`. Cached per filter; the
+        cache is dropped on our own writes and, through SQLite's
+        data_version, on commits from other processes.
+        """
+        key = json.dumps(where, sort_keys=True)
+        version = (self._writes, self._db.execute("PRAGMA data_version").fetchone()[0])
+        cached = self._filter_rows.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        params: list = []
+        rows = self._np.fromiter((r[0] for r in self._db.execute(
+            f"SELECT row FROM chunks WHERE {_where_sql(where, params)} ORDER BY row", params
+        )), dtype=self._np.int64)
+        if len(self._filter_rows) >= MEMMAP_FILTER_CACHE_SIZE:
+            self._filter_rows.clear()
+        self._filter_rows[key] = (version, rows)
+        return rows
+
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"Collection {self.repo} was opened read-only")
+
+    # --- CollectionBackend ---
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self._check_writable()
+        np = self._np
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            dim = self._load_dim()
+            if dim is None:
+                self.dim = dim = vectors.shape[1]
+                self._db.execute("INSERT OR REPLACE INTO info VALUES ('dim', ?)", (str(dim),))
+            elif vectors.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({dim})")
+
+            existing = self._rows_for(ids)
+            next_row = self._total_rows()
+            row_bytes = 4 * dim
+            records = []
+            with open(self.vectors_path, 'r+b' if os.path.exists(self.vectors_path) else 'w+b') as f:
+                for i, doc_id in enumerate(ids):
+                    row = existing.get(doc_id)
+                    if row is None:
+                        row, next_row = next_row, next_row + 1
+                    f.seek(row * row_bytes)
+                    f.write(vectors[i].tobytes())
+                    records.append((row, doc_id, documents[i], json.dumps(metadatas[i])))
+            # Vectors land before their rows become visible to readers
+            self._db.executemany("INSERT OR REPLACE INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)", records)
+            self._db.commit()
+            self._writes += 1
+
+    def delete(self, ids):
+        self._check_writable()
+        with self._lock:
+            rows = self._rows_for(list(ids))
+            if not rows:
+                return
+            blank = self._np.full(self._load_dim(), self._np.nan, dtype=self._np.float32).tobytes()
+            with open(self.vectors_path, 'r+b') as f:
+                for row in rows.values():
+                    f.seek(row * len(blank))
+                    f.write(blank)
+            self._db.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows.values()])
+            self._db.commit()
+            self._writes += 1
+
+    def get(self, ids=None, where=None, limit=None, offset=0):
+        params: list = []
+        sql = f"SELECT id, document, metadata FROM chunks WHERE {_where_sql(where, params)}"
+        if ids is not None:
+            if not ids:
+                return {"ids": [], "documents": [], "metadatas": []}
+            sql += f" AND id IN ({','.join('?' * len(ids))})"
+            params.extend(ids)
+        sql += " ORDER BY row"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset or 0])
+        with self._lock:
+            records = self._db.execute(sql, params).fetchall()
+        return {
+            "ids": [r[0] for r in records],
+            "documents": [r[1] for r in records],
+            "metadatas": [json.loads(r[2]) for r in records]
+        }
+
+    def query(self, embedding, n_results, where=None):
+        np = self._np
+        empty = {"ids": [], "documents": [], "metadatas": []}
+        with self._lock:
+            self._refresh()
+            matrix = self._matrix
+            if matrix is None or n_results <= 0:
+                return empty
+            allowed = None
+            if where:
+                allowed = self._rows_matching(where)
+                allowed = allowed[allowed < matrix.shape[0]]
+                if not len(allowed):
+                    return empty
+
+        query_vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query_vec)
+        if norm:
+            query_vec = query_vec / norm
+
+        # Blockwise exact top-k keeps temporaries bounded for large matrices
+        total = len(allowed) if allowed is not None else matrix.shape[0]
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, total, MEMMAP_QUERY_BLOCK_ROWS):
+            if allowed is not None:
+                rows = allowed[start:start + MEMMAP_QUERY_BLOCK_ROWS]
+                scores = matrix[rows] @ query_vec
+            else:
+                rows = np.arange(start, min(start + MEMMAP_QUERY_BLOCK_ROWS, total))
+                scores = matrix[start:start + MEMMAP_QUERY_BLOCK_ROWS] @ query_vec
+            scores = np.where(np.isnan(scores), -np.inf, scores)  # deleted rows
+            if len(scores) > n_results:
+                top = np.argpartition(-scores, n_results)[:n_results]
+                rows, scores = rows[top], scores[top]
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+
+        order = np.argsort(-best_scores, kind="stable")[:n_results]
+        top_rows = [int(best_rows[i]) for i in order if np.isfinite(best_scores[i])]
+        if not top_rows:
+            return empty
+
+        with self._lock:
+            records = {r[0]: r[1:] for r in self._db.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(top_rows))})", top_rows
+            )}
+        top_rows = [row for row in top_rows if row in records]
+        return {
+            "ids": [records[row][0] for row in top_rows],
+            "documents": [records[row][1] for row in top_rows],
+            "metadatas": [json.loads(records[row][2]) for row in top_rows]
+        }
+
+    def flush(self):
+        if self.read_only:
+            return
+        with self._lock:
+            total = self._total_rows()
+            if total and (total - self.count()) / total > MEMMAP_COMPACT_RATIO:
+                self.compact()
+
+    def compact(self):
+        """Rewrites the vector file without deleted rows and renumbers the sidecar."""
+        self._check_writable()
+        np = self._np
+        with self._lock:
+            self._refresh()
+            live = [r[0] for r in self._db.execute("SELECT row FROM chunks ORDER BY row")]
+            tmp_path = f"{self.vectors_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                for start in range(0, len(live), MEMMAP_QUERY_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(self._matrix[live[start:start + MEMMAP_QUERY_BLOCK_ROWS]]).tobytes())
+            # Ascending order: each row moves down into a slot that is already free
+            self._db.executemany("UPDATE chunks SET row = ? WHERE row = ?",
+                                 [(new, old) for new, old in enumerate(live) if new != old])
+            os.replace(tmp_path, self.vectors_path)
+            self._db.commit()
+            self._writes += 1
+            print(f"Compacted {self.repo}: {len(live)} live rows kept.")
+
+class MemmapBackend(StorageBackend):
+    """One directory per repository under <persist_path>/memmap."""
+    def __init__(self, persist_path: str, read_only: bool = False):
+        self.root = os.path.join(persist_path, "memmap")
+        self.read_only = read_only
+
+    def open_collection(self, repo: str) -> MemmapCollection:
+        return MemmapCollection(os.path.join(self.root, repo), repo, read_only=self.read_only)
+
+    def list_repos(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, "meta.sqlite")))
+
+def create_backend(name: str, persist_path: str, read_only: bool = False) -> StorageBackend:
+    if name == "chroma":
+        return ChromaBackend(persist_path)
+    if name == "memmap":
+        return MemmapBackend(persist_path, read_only=read_only)
+    raise ValueError(f"Unknown storage backend {name!r} (expected 'chroma' or 'memmap')")
@@ -2,14 +2,21 @@
 import streamlit as st
 import requests
 import json
+import os
 
 API_URL = "http://localhost:8000"
+# Syntax highlighting for search results, by file extension
+CODE_LANGUAGES = {
+    ".py": "python", ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript", ".java": "java", ".go": "go"
+}
 
 st.title("🤖 AI Code Documentation")
 
 with st.sidebar:
     st.header("Settings")
     repo_path = st.text_input("Repository Path", value="D:/academics/python/Pong game")
+    repo_label = st.text_input("Repository Name (optional)", help="Defaults to the folder name plus a short hash of its full path")
     
     if st.button("Ingest Codebase"):
         # Create a container for the logs
@@ -19,7 +26,7 @@ with st.sidebar:
             # stream=True is critical here
             response = requests.post(
                 f"{API_URL}/ingest", 
-                json={"path": repo_path}, 
+                json={"path": repo_path, "repo": repo_label or None}, 
                 stream=True
             )
             
@@ -38,6 +45,16 @@ with st.sidebar:
                         elif data['status'] == 'complete':
                             status_box.update(label="✅ Complete!", state="complete", expanded=False)
                             st.success(data['message'])
+
+                        elif data['status'] == 'cancelled':
+                            status_box.update(label="⏹️ Cancelled", state="error", expanded=False)
+                            st.warning(data['message'])
+
+                        elif data['status'] == 'starting' and 'job_id' in data:
+                            status_box.write(f"Job id: {data['job_id']}")
+
+                        elif data['status'] == 'summary':
+                            st.info(data['message'])
             else:
                 st.error(f"Server Error: {response.status_code}")
                 
@@ -48,16 +65,76 @@ with st.sidebar:
 st.header("Ask about your code")
 query = st.text_input("Question:", placeholder="How does the paddle movement work?")
 
-if query:
+with st.expander("Filters"):
+    filter_repo = st.text_input("Repository", placeholder="all repositories")
+    filter_path = st.text_input("Path prefix", placeholder="e.g. src/game")
+    filter_type = st.selectbox("Chunk type", ["any", "class", "method", "function"])
+
+generate_answer = st.toggle("Generate an answer", value=True, help="Off: show the matching code only")
+
+def query_payload(query: str, repo: str = "", path_prefix: str = "", chunk_type: str = "any") -> dict:
+    return {
+        "query": query,
+        "repo": repo or None,
+        "path_prefix": path_prefix or None,
+        "chunk_type": None if chunk_type == "any" else chunk_type
+    }
+
+@st.cache_data(ttl=30, show_spinner=False)
+def search_docs(query: str, repo: str = "", path_prefix: str = "", chunk_type: str = "any") -> list:
+    # Streamlit reruns this script on every interaction; don't re-query the
+    # server for a question we just answered
+    response = requests.post(f"{API_URL}/search", json=query_payload(query, repo, path_prefix, chunk_type))
+    response.raise_for_status() # Errors are not cached
+    return response.json().get("results", [])
+
+def stream_answer(payload: dict, sources: list):
+    """Yields answer tokens from /ask as they arrive; the sources event fills `sources`."""
+    with requests.post(f"{API_URL}/ask", json=payload, stream=True) as response:
+        response.raise_for_status()
+        # chunk_size=None: hand over each line as soon as it arrives
+        for line in response.iter_lines(chunk_size=None):
+            if not line:
+                continue
+            data = json.loads(line)
+            if data['status'] == 'sources':
+                sources.extend(data['sources'])
+            elif data['status'] == 'token':
+                yield data['text']
+            elif data['status'] == 'error':
+                raise RuntimeError(data['message'])
+            elif data['status'] == 'complete' and not sources:
+                yield data['message']
+
+def show_sources(results: list):
+    for item in results:
+        with st.expander(f"📄 {item.get('repo') or ''}:{item['file']} - {item['summary']}"):
+            st.code(item['content'], language=CODE_LANGUAGES.get(os.path.splitext(item['file'])[1], 'python'))
+
+if query and generate_answer:
+    payload = query_payload(" ".join(query.split()), filter_repo.strip(), filter_path.strip(), filter_type)
+    key = json.dumps(payload, sort_keys=True)
+    previous = st.session_state.get("answer")
+
+    # Reruns redraw the last answer instead of generating it again
+    if previous and previous[0] == key:
+        _, answer, results = previous
+        st.markdown(answer)
+    else:
+        results = []
+        try:
+            # Renders tokens progressively while the model is still generating
+            answer = st.write_stream(stream_answer(payload, results))
+            st.session_state["answer"] = (key, answer, results)
+        except Exception as e:
+            st.error(f"Answer failed: {e}")
+    show_sources(results)
+
+elif query:
     with st.spinner("Searching docs..."):
-        response = requests.post(f"{API_URL}/search", json={"query": query})
-        data = response.json()
-        
-        results = data.get("results", [])
+        results = search_docs(" ".join(query.split()), filter_repo.strip(), filter_path.strip(), filter_type)
         
         if not results:
             st.warning("No relevant documentation found.")
         else:
-            for item in results:
-                with st.expander(f"📄 {item['file']} - {item['summary']}"):
-                    st.code(item['content'], language='python')
\ No newline at end of file
+            show_sources(results)
@@ -1,70 +1,332 @@
 # src/vector_store.py
-import chromadb
-from typing import List
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .cache import LRUCache
+from .lexical_index import LexicalIndex, LEXICAL_INDEX_DIR
+from .metrics import METRICS
 from .models import CodeChunk
+from .namespaces import build_where, document_id, normalize_path, path_prefix_metadata, validate_repo_name
+from .storage import CollectionBackend, StorageBackend, create_backend
 
-class VectorStore:
-    def __init__(self, persist_path="./chroma_db"):
-        self.client = chromadb.PersistentClient(path=persist_path)
-        self.collection = self.client.get_or_create_collection(name="codebase_docs")
+# Where vectors live: "chroma" (chromadb.PersistentClient) or "memmap"
+# (float32 matrix + SQLite sidecar, NumPy top-k; see storage.py)
+STORAGE_BACKEND = "chroma"
 
-    def add_chunks(self, chunks: List[CodeChunk]):
-        ids = []
-        documents = []
-        metadatas = []
-        embeddings = []
+# /search caches: query embeddings are reused indefinitely (LRU), result
+# lists only briefly and are dropped whenever a collection changes
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 30.0
+# Hybrid search: candidates taken from each retriever before fusing, and the
+# Reciprocal Rank Fusion constant (higher = flatter weighting of ranks)
+HYBRID_CANDIDATES_PER_RESULT = 4
+RRF_K = 60
+# Exact symbol matches always rank above fused scores (at most 2 / (RRF_K + 1))
+SYMBOL_MATCH_SCORE = 1.0
 
-        # We will batch process this in a real app, but loop is fine for now
-        from .ai_engine import get_embedding, generate_summary
+# (doc_id, document, metadata, score)
+SearchHit = Tuple[str, str, dict, float]
 
-        print(f"Processing {len(chunks)} chunks for indexing...")
+def normalize_query(query: str) -> str:
+    """Collapses whitespace so trivially different queries share cache entries."""
+    return " ".join(query.split())
 
-        for chunk in chunks:
-            print(f"  -> AI analyzing: {chunk.chunk_id}...")
-            
-            # 1. Generate Summary (The "Semantic" part)
-            summary = generate_summary(chunk.code, chunk.chunk_id)
-            chunk.summary = summary # Update the object
-            
-            # 2. Prepare Embedding Input (RAG Context)
-            # We mix code + structural info + AI summary for better retrieval
-            embed_text = f"""
+def build_embed_text(chunk: CodeChunk) -> str:
+    """
+    Prepares the Embedding Input (RAG Context) for a summarized chunk.
+    We mix code + structural info + AI summary for better retrieval.
+    """
+    return f"""
             File: {chunk.file_path}
             Symbol: {chunk.chunk_id}
             Type: {chunk.chunk_type}
-            Summary: {summary}
+            Summary: {chunk.summary}
             Code:
             {chunk.code}
             """
-            
-            vector = get_embedding(embed_text)
-            
-            if vector:
-                ids.append(chunk.chunk_id)
+
+def build_lexical_text(chunk_id: str, parent: str, imports: Sequence[str], code: str) -> str:
+    """What the lexical index sees for a chunk: its names, imports and code tokens."""
+    return f"{chunk_id} {parent} {' '.join(imports)} {code}"
+
+class RepoCollection:
+    """
+    One repository's namespace: its own backend collection and lexical index.
+    Ids are stable across repos (see namespaces.document_id), so same-named
+    symbols in different files or repositories never overwrite each other.
+    The ingest pipeline works against one of these.
+    """
+    def __init__(self, collection: CollectionBackend, persist_path: str, repo: str,
+                 on_change: Callable[[], None] = lambda: None, read_only: bool = False):
+        self.repo = repo
+        self.collection = collection
+        self._on_change = on_change
+
+        self.lexical = LexicalIndex(os.path.join(persist_path, LEXICAL_INDEX_DIR, f"{repo}.json"), read_only=read_only)
+        if not self.lexical.exists_on_disk and self.collection.count():
+            self._rebuild_lexical_index()
+
+    def _rebuild_lexical_index(self, page_size: int = 1000):
+        """
+        Backfills the lexical index for a collection indexed before it existed.
+        A read-only store only builds it in memory.
+        """
+        print(f"Building lexical index for {self.repo} from the existing collection...")
+        offset = 0
+        while True:
+            page = self.collection.get(limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            for doc_id, doc, meta in zip(page['ids'], page['documents'], page['metadatas']):
+                symbol = meta.get('chunk_id', doc_id)
+                imports = (meta.get('imports') or "").split(",")
+                self.lexical.add(doc_id, symbol, build_lexical_text(symbol, meta.get('parent', ""), imports, doc))
+            offset += len(page['ids'])
+        self.lexical.save(force=True)
+
+    def document_id(self, chunk: CodeChunk) -> str:
+        return document_id(self.repo, chunk.file_path, chunk.chunk_id)
+
+    def add_chunks(self, chunks: List[CodeChunk]):
+        from .ai_engine import summarize_chunks, get_embeddings, SUMMARY_FAILED
+
+        print(f"Processing {len(chunks)} chunks for indexing...")
+
+        # 1. Generate Summaries (The "Semantic" part) on a bounded worker pool;
+        # each result comes back paired with the chunk it belongs to
+        for chunk, summary in summarize_chunks(chunks):
+            print(f"  -> AI analyzed: {chunk.chunk_id}")
+            chunk.summary = summary # Update the object
+        # A failed summary is no summary: keep the placeholder out of the index
+        chunks = [chunk for chunk in chunks if chunk.summary != SUMMARY_FAILED]
+
+        # 2. Embed everything in a few batched requests, mapped back by position
+        embed_texts = [build_embed_text(chunk) for chunk in chunks]
+        vectors = get_embeddings(embed_texts)
+
+        # 3. Batch Insert into Chroma
+        self.upsert_chunks(chunks, embed_texts, vectors)
+
+    def upsert_chunks(self, chunks: List[CodeChunk], embed_texts: List[str], vectors: List[List[float]]) -> int:
+        """
+        Writes summarized, embedded chunks to the collection.
+        Chunks whose embedding failed are skipped. Returns the number indexed.
+        """
+        ids = []
+        documents = []
+        metadatas = []
+        embeddings = []
+
+        # Chroma rejects duplicate ids within one upsert; the last chunk that got
+        # an embedding wins, just as it would across separate upserts
+        doc_ids = [self.document_id(chunk) for chunk in chunks]
+        last_index = {doc_id: i for i, (doc_id, vector) in enumerate(zip(doc_ids, vectors)) if vector}
+
+        for i, (chunk, doc_id, embed_text, vector) in enumerate(zip(chunks, doc_ids, embed_texts, vectors)):
+            if last_index.get(doc_id) == i:
+                ids.append(doc_id)
                 documents.append(embed_text) # This is what we search against
                 embeddings.append(vector)
                 metadatas.append({
-                    "file_path": chunk.file_path,
+                    "repo": self.repo,
+                    "chunk_id": chunk.chunk_id,
+                    "file_path": normalize_path(chunk.file_path),
                     "type": chunk.chunk_type,
                     "parent": chunk.parent or "",
-                    "summary": summary
+                    "imports": ",".join(chunk.imports),
+                    "summary": chunk.summary,
+                    **path_prefix_metadata(chunk.file_path)
                 })
+                self._add_lexical(doc_id, chunk)
 
-        # 3. Batch Insert into Chroma
         if ids:
-            self.collection.upsert(
-                ids=ids,
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas
-            )
+            with METRICS.timed("upsert"):
+                self.collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=documents,
+                    metadatas=metadatas
+                )
+            METRICS.inc("ingest_items_total", len(ids), stage="upsert")
+            self._on_change()
+            self.lexical.save()
             print(f"Successfully indexed {len(ids)} chunks.")
+        return len(ids)
+
+    def _add_lexical(self, doc_id: str, chunk: CodeChunk):
+        self.lexical.add(doc_id, chunk.chunk_id, build_lexical_text(
+            chunk.chunk_id, chunk.parent or "", chunk.imports, chunk.code
+        ))
+
+    def restore_lexical(self, chunks: List[CodeChunk]):
+        """
+        Re-adds chunks that are already in the collection to the lexical index.
+        A resumed ingest skips their upsert, but the interrupted run may have
+        stopped before its last lexical index save.
+        """
+        for chunk in chunks:
+            self._add_lexical(self.document_id(chunk), chunk)
+
+    def flush(self):
+        """Persists in-memory index state; call at the end of an ingest."""
+        self.lexical.save(force=True)
+        self.collection.flush()
+
+    def delete_chunks(self, doc_ids: List[str]):
+        """Removes chunks for deleted files or symbols from the index."""
+        if doc_ids:
+            self.collection.delete(ids=list(doc_ids))
+            self.lexical.remove(doc_ids)
+            self._on_change()
+            print(f"Removed {len(doc_ids)} stale chunks.")
+
+    def search(self, query: str, n_results: int, where: Optional[dict],
+               embed_query: Callable[[str], List[float]]) -> List[SearchHit]:
+        """
+        Retrieval within this repository: an exact symbol name is answered by
+        symbol_search, anything else by hybrid_search.
+        """
+        return self.symbol_search(query, n_results, where) or self.hybrid_search(query, n_results, where, embed_query)
+
+    def symbol_search(self, query: str, n_results: int, where: Optional[dict]) -> List[SearchHit]:
+        """
+        Chunks whose symbol name is exactly the query ("Ball.move"), answered
+        from the lexical index without calling the embedding model.
+        """
+        symbol_ids = self.lexical.lookup_symbol(query)
+        found = self._fetch(symbol_ids, where)
+        return [(doc_id, *found[doc_id], SYMBOL_MATCH_SCORE) for doc_id in symbol_ids if doc_id in found][:n_results]
+
+    def hybrid_search(self, query: str, n_results: int, where: Optional[dict],
+                      embed_query: Callable[[str], List[float]]) -> List[SearchHit]:
+        """
+        Fuses BM25 and vector rankings with Reciprocal Rank Fusion.
+        Only chunks matching `where` are returned.
+        """
+        candidates = n_results * HYBRID_CANDIDATES_PER_RESULT
+        # Lexical hits outside the filter are dropped afterwards, so look further down the list
+        lexical_ids = [doc_id for doc_id, _ in self.lexical.search(query, candidates * (4 if where else 1))]
+
+        vector_ids = []
+        known: Dict[str, tuple] = {}
+        query_vec = embed_query(query) if self.collection.count() else None
+        if query_vec:
+            dense = self.collection.query(query_vec, candidates, where=where)
+            vector_ids = dense['ids']
+            known = {doc_id: (doc, meta) for doc_id, doc, meta in zip(vector_ids, dense['documents'], dense['metadatas'])}
+
+        known.update(self._fetch([doc_id for doc_id in lexical_ids if doc_id not in known], where))
+        lexical_ids = [doc_id for doc_id in lexical_ids if doc_id in known][:candidates]
+
+        # Reciprocal Rank Fusion: rewards documents ranked well by either retriever
+        scores: Dict[str, float] = {}
+        for ranking in (lexical_ids, vector_ids):
+            for rank, doc_id in enumerate(ranking):
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        top_ids = sorted(scores, key=scores.get, reverse=True)[:n_results]
 
-    def search(self, query: str, n_results=3):
+        return [(doc_id, *known[doc_id], scores[doc_id]) for doc_id in top_ids]
+
+    def _fetch(self, ids: List[str], where: Optional[dict] = None) -> Dict[str, tuple]:
+        """Loads (document, metadata) for the ids that exist and match `where`."""
+        if not ids:
+            return {}
+        # Ids the lexical index still knows but the collection doesn't are dropped
+        page = self.collection.get(ids=ids, where=where)
+        return {doc_id: (doc, meta) for doc_id, doc, meta in zip(page['ids'], page['documents'], page['metadatas'])}
+
+class VectorStore:
+    """
+    All indexed repositories, one RepoCollection (backend collection plus
+    lexical index) per repository. Searches can be scoped to one repo so
+    large multi-repo corpora don't scan unrelated collections.
+
+    Pass read_only=True (memmap backend) for search-only worker processes
+    that share an index written by another process.
+    """
+    def __init__(self, persist_path="./chroma_db", backend: Optional[str] = None, read_only: bool = False):
+        self.persist_path = persist_path
+        self.read_only = read_only
+        self.backend: StorageBackend = create_backend(backend or STORAGE_BACKEND, persist_path, read_only=read_only)
+        self._repos: Dict[str, RepoCollection] = {}
+        self._repos_lock = threading.Lock()
+        self._query_embeddings = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+        self._results = LRUCache(RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+    def repo(self, name: str) -> RepoCollection:
+        """The namespace for a repository, created on first use."""
+        validate_repo_name(name)
+        with self._repos_lock:
+            namespace = self._repos.get(name)
+            if namespace is None:
+                namespace = self._repos[name] = RepoCollection(
+                    self.backend.open_collection(name), self.persist_path, name,
+                    on_change=self._results.clear, read_only=self.read_only
+                )
+            return namespace
+
+    def repos(self) -> List[str]:
+        """Names of all repositories that have a collection."""
+        return self.backend.list_repos()
+
+    def search(self, query: str, n_results=3, repo: Optional[str] = None,
+               path_prefix: Optional[str] = None, chunk_type: Optional[str] = None):
+        """
+        Hybrid search over one repository, or all of them when repo is None,
+        optionally limited to a path prefix and a chunk type.
+        Returns the same shape as collection.query, plus per-result scores.
+        """
+        query = normalize_query(query)
+        # Case-insensitive key for results; the embedding keeps the original casing
+        result_key = (query.casefold(), n_results, repo, path_prefix, chunk_type)
+        results = self._results.get(result_key)
+        if results is not None:
+            return results
+
+        names = self.repos()
+        if repo is not None:
+            names = [name for name in names if name == repo]
+        where = build_where(path_prefix, chunk_type)
+
+        # The query is embedded at most once, however many repositories we search
+        query_vectors: Dict[str, List[float]] = {}
+        def embed_query(text: str) -> List[float]:
+            if text not in query_vectors:
+                query_vectors[text] = self._embed_query(text)
+            return query_vectors[text]
+
+        namespaces = [self.repo(name) for name in names]
+        # An exact symbol name in any repository wins outright: no embedding, no fused hits from the others
+        hits: List[SearchHit] = []
+        for namespace in namespaces:
+            hits.extend(namespace.symbol_search(query, n_results, where))
+        if not hits:
+            for namespace in namespaces:
+                hits.extend(namespace.hybrid_search(query, n_results, where, embed_query))
+        hits = sorted(hits, key=lambda hit: hit[3], reverse=True)[:n_results]
+
+        results = {
+            "ids": [[hit[0] for hit in hits]],
+            "documents": [[hit[1] for hit in hits]],
+            "metadatas": [[hit[2] for hit in hits]],
+            "scores": [[hit[3] for hit in hits]]
+        }
+        self._results.put(result_key, results)
+        return results
+
+    def _embed_query(self, query: str) -> List[float]:
         from .ai_engine import get_embedding
-        query_vec = get_embedding(query)
-        
-        return self.collection.query(
-            query_embeddings=[query_vec],
-            n_results=n_results
-        )
+
+        query_vec = self._query_embeddings.get(query)
+        if query_vec is None:
+            query_vec = get_embedding(query)
+            if query_vec:
+                self._query_embeddings.put(query, query_vec)
+        return query_vec
+
+    def cache_stats(self) -> dict:
+        return {
+            "query_embeddings": self._query_embeddings.stats(),
+            "results": self._results.stats()
+        }
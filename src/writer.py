@@ -1,78 +1,185 @@
+import ast
+import io
 import os
+import tempfile
 import textwrap
-from typing import List
+from typing import Dict, List, Optional
+from .chunker import parse_python
+from .ingest import calculate_hash
 from .models import CodeChunk
 
+# Files are independent, so write-back runs on a small thread pool
+WRITE_WORKERS = 8
+# Docstring injection only knows Python; other languages are indexed, not edited
+WRITABLE_LANGUAGES = {"python"}
+
+class FileChangedError(Exception):
+    """The file on disk no longer matches the version that was scanned."""
+
 def get_indentation(line: str) -> str:
     """Calculates the leading whitespace of a line."""
     return line[:len(line) - len(line.lstrip())]
 
-def inject_docstrings(file_path: str, chunks: List[CodeChunk]):
+def format_docstring(summary: str, doc_indent: str, newline: str = "\n") -> str:
     """
-    Injects AI-generated summaries. 
+    Builds the docstring block for a summary.
     Handles text wrapping for long summaries.
     """
+    summary = summary.replace('"""', "'''")
+
+    # Text Wrapping Logic
+    # We calculate how much space we have left on an 80-char line
+    # If the indent is deep, we ensure at least 40 chars of text width
+    max_width = max(40, 88 - len(doc_indent))
+
+    # Most summaries fit on one line; skip textwrap for those
+    if len(summary) <= max_width and "\n" not in summary:
+        wrapped_lines = [summary.strip()]
+    else:
+        wrapped_lines = textwrap.wrap(summary, width=max_width)
+
+    if len(wrapped_lines) > 1:
+        # Multi-line Paragraph Format
+        # """
+        # Line 1...
+        # Line 2...
+        # """
+        docstring_content = f'{doc_indent}"""{newline}'
+        for line in wrapped_lines:
+            docstring_content += f'{doc_indent}{line}{newline}'
+        docstring_content += f'{doc_indent}"""{newline}'
+    else:
+        # Single-line Format
+        # """Summary."""
+        docstring_content = f'{doc_indent}"""{summary}"""{newline}'
+
+    return docstring_content
+
+def _definitions_by_line(tree: ast.AST) -> Dict[int, ast.AST]:
+    """
+    Maps line number -> class/function node. Only statement blocks are
+    visited; definitions never live inside expressions, so a full
+    ast.walk would mostly be wasted work.
+    """
+    definitions = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+            block = getattr(node, field, None)
+            if not isinstance(block, list):
+                continue
+            for child in block:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    definitions[child.lineno] = child
+                stack.append(child)
+    return definitions
+
+def _atomic_write(file_path: str, content: str, expected_stat: os.stat_result):
+    """
+    Writes through a temp file in the same directory and renames it over the
+    original, so readers never see a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        os.chmod(tmp_path, expected_stat.st_mode & 0o7777)
+
+        # Last check for an edit that landed while we were building the new content
+        current = os.stat(file_path)
+        if (current.st_mtime_ns, current.st_size) != (expected_stat.st_mtime_ns, expected_stat.st_size):
+            raise FileChangedError(f"{file_path} changed while docstrings were being written")
+
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def inject_docstrings(file_path: str, chunks: List[CodeChunk], expected_hash: Optional[str] = None) -> int:
+    """
+    Injects AI-generated summaries in a single pass over the file.
+    If expected_hash is given and the file no longer matches it (edited since
+    the scan), raises FileChangedError instead of touching the file.
+    Chunks without a real summary are skipped. Returns the number of
+    docstrings written.
+    """
+    from .ai_engine import SUMMARY_FAILED
+
     if not os.path.exists(file_path):
         print(f"Error: File not found {file_path}")
-        return
+        return 0
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    file_stat = os.stat(file_path)
+    # newline='' keeps the file's own line endings on the way back out
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        content = f.read()
 
-    # Sort chunks bottom-to-top to preserve line numbers
-    chunks.sort(key=lambda x: x.start_line, reverse=True)
+    if expected_hash is not None:
+        # Hash exactly as scan_repository did (universal newlines)
+        if calculate_hash(content.replace('\r\n', '\n').replace('\r', '\n')) != expected_hash:
+            raise FileChangedError(f"{file_path} changed since it was scanned")
 
-    modified_count = 0
+    try:
+        tree = parse_python(content)
+    except SyntaxError:
+        print(f"Syntax Error in {file_path}, not injecting docstrings.")
+        return 0
 
-    for chunk in chunks:
-        if not chunk.summary:
+    # Split only on real line endings, as ast counts them: str.splitlines also
+    # breaks on form feeds, \x1c-\x1e, \x85, \u2028 and \u2029
+    lines = io.StringIO(content, newline='').readlines()
+    newline = '\r\n' if lines and lines[0].endswith('\r\n') else '\n'
+    definitions = _definitions_by_line(tree)
+
+    # 1. Work out every insertion up front: line index -> docstring block
+    insertions: Dict[int, str] = {}
+
+    for chunk in sorted(chunks, key=lambda x: x.start_line):
+        # A placeholder docstring would block the real one for good
+        if not chunk.summary or chunk.summary == SUMMARY_FAILED:
             continue
 
-        # 1. Identify insertion point
-        def_line_idx = chunk.start_line - 1
-        insert_idx = def_line_idx + 1
+        node = definitions.get(chunk.start_line)
+        if node is None:
+            print(f"Skipping {chunk.chunk_id}: definition not found at line {chunk.start_line}.")
+            continue
 
         # 2. Check for existing docstrings to avoid duplicates
-        if insert_idx < len(lines):
-            next_line = lines[insert_idx].strip()
-            if next_line.startswith('"""') or next_line.startswith("'''"):
-                print(f"Skipping {chunk.chunk_id}: Docstring already exists.")
-                continue
+        if ast.get_docstring(node, clean=False) is not None:
+            print(f"Skipping {chunk.chunk_id}: Docstring already exists.")
+            continue
+
+        # 3. The docstring goes right above the first body statement, which
+        # also handles signatures that span several lines
+        first_stmt = node.body[0]
+        # A decorated first statement starts at its first decorator
+        first_line = min([first_stmt.lineno] + [d.lineno for d in getattr(first_stmt, 'decorator_list', [])])
+        if first_line == node.lineno:
+            print(f"Skipping {chunk.chunk_id}: body starts on the definition line.")
+            continue
+        insert_idx = first_line - 1
+
+        # 4. Match the body's own indentation
+        doc_indent = get_indentation(lines[insert_idx])
 
-        # 3. Calculate Indentation
-        base_indent = get_indentation(lines[def_line_idx])
-        doc_indent = base_indent + "    " # Standard 4-space indent
-        
-        # 4. Text Wrapping Logic
-        # We calculate how much space we have left on an 80-char line
-        # If the indent is deep, we ensure at least 40 chars of text width
-        max_width = max(40, 88 - len(doc_indent))
-        
-        wrapped_lines = textwrap.wrap(chunk.summary, width=max_width)
-
-        if len(wrapped_lines) > 1:
-            # Multi-line Paragraph Format
-            # """
-            # Line 1...
-            # Line 2...
-            # """
-            docstring_content = f'{doc_indent}"""\n'
-            for line in wrapped_lines:
-                docstring_content += f'{doc_indent}{line}\n'
-            docstring_content += f'{doc_indent}"""\n'
-        else:
-            # Single-line Format
-            # """Summary."""
-            docstring_content = f'{doc_indent}"""{chunk.summary}"""\n'
-
-        # 5. Insert
-        lines.insert(insert_idx, docstring_content)
-        modified_count += 1
+        insertions[insert_idx] = format_docstring(chunk.summary, doc_indent, newline)
         print(f"  -> Injected docstring for {chunk.chunk_id}")
 
-    if modified_count > 0:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
-        print(f"Successfully updated {file_path} with {modified_count} docstrings.")
-    else:
-        print(f"No changes made to {file_path}.")
\ No newline at end of file
+    if not insertions:
+        print(f"No changes made to {file_path}.")
+        return 0
+
+    # 5. Merge original lines and docstrings in one pass
+    output = []
+    for i, line in enumerate(lines):
+        if i in insertions:
+            output.append(insertions[i])
+        output.append(line)
+
+    _atomic_write(file_path, "".join(output), file_stat)
+    print(f"Successfully updated {file_path} with {len(insertions)} docstrings.")
+
+    return len(insertions)
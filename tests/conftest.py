@@ -0,0 +1,8 @@
+# tests/conftest.py
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# src is imported as a package from the repository root; the fake model server lives in benchmarks
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
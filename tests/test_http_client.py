@@ -0,0 +1,128 @@
+# tests/test_http_client.py
+"""ModelClient retries, timeouts and circuit breaker against the local fake model server."""
+import socket
+import time
+
+import pytest
+import requests
+
+from fake_model_server import FakeModelConfig, start_fake_server
+from src.http_client import CircuitOpenError, ModelClient
+
+CHAT = "/chat/completions"
+PAYLOAD = {"model": "test", "messages": [{"role": "user", "content": "hello"}]}
+
+@pytest.fixture
+def fake_server():
+    config = FakeModelConfig()
+    server, base_url = start_fake_server(config)
+    yield config, base_url
+    server.shutdown()
+    server.server_close()
+
+def make_client(base_url: str, **kwargs) -> ModelClient:
+    # Keep backoff sleeps out of the test run
+    kwargs.setdefault("backoff_base", 0.001)
+    return ModelClient(base_url, **kwargs)
+
+def attempts(config: FakeModelConfig) -> int:
+    return config.requests["chat"] + config.requests["failed"]
+
+def unused_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def test_retries_5xx_until_success(fake_server):
+    config, base_url = fake_server
+    config.fail_next = [500, 503]
+
+    response = make_client(base_url, max_retries=3).post_json(CHAT, PAYLOAD)
+
+    assert response.status_code == 200
+    assert attempts(config) == 3
+
+def test_gives_up_after_max_retries(fake_server):
+    config, base_url = fake_server
+    config.fail_next = [500] * 10
+
+    with pytest.raises(requests.HTTPError):
+        make_client(base_url, max_retries=2).post_json(CHAT, PAYLOAD)
+    assert attempts(config) == 3
+
+def test_does_not_retry_4xx(fake_server):
+    config, base_url = fake_server
+    config.fail_next = [400]
+    client = make_client(base_url, max_retries=3, breaker_threshold=1)
+
+    with pytest.raises(requests.HTTPError):
+        client.post_json(CHAT, PAYLOAD)
+    assert attempts(config) == 1
+    # A client error says nothing about the server's health
+    assert not client.circuit_open
+
+def test_retries_timeouts(fake_server):
+    config, base_url = fake_server
+    config.latency = 0.5
+
+    with pytest.raises(requests.Timeout):
+        make_client(base_url, max_retries=1).post_json(CHAT, PAYLOAD, read_timeout=0.1)
+    assert config.requests["chat"] == 2
+
+def test_retries_connection_errors():
+    client = make_client(f"http://127.0.0.1:{unused_port()}/v1", max_retries=2, breaker_threshold=3)
+
+    with pytest.raises(requests.ConnectionError):
+        client.post_json(CHAT, PAYLOAD)
+    # One failure per attempt: the third one trips the breaker
+    assert client.circuit_open
+
+def test_breaker_opens_and_fails_fast(fake_server):
+    config, base_url = fake_server
+    config.fail_next = [500] * 3
+    client = make_client(base_url, max_retries=0, breaker_threshold=3, breaker_cooldown=60)
+
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client.post_json(CHAT, PAYLOAD)
+    assert client.circuit_open
+
+    with pytest.raises(CircuitOpenError):
+        client.post_json(CHAT, PAYLOAD)
+    # The open breaker never contacted the server
+    assert attempts(config) == 3
+
+def test_half_open_probe_closes_breaker(fake_server):
+    config, base_url = fake_server
+    config.fail_next = [500] * 2
+    client = make_client(base_url, max_retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.post_json(CHAT, PAYLOAD)
+    with pytest.raises(CircuitOpenError):
+        client.post_json(CHAT, PAYLOAD)
+
+    time.sleep(0.3)
+    assert client.post_json(CHAT, PAYLOAD).status_code == 200
+    assert not client.circuit_open
+    assert client.post_json(CHAT, PAYLOAD).status_code == 200
+    assert attempts(config) == 4
+
+def test_failed_probe_reopens_breaker(fake_server):
+    config, base_url = fake_server
+    config.fail_next = [500] * 3
+    client = make_client(base_url, max_retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.post_json(CHAT, PAYLOAD)
+
+    time.sleep(0.3)
+    with pytest.raises(requests.HTTPError):
+        client.post_json(CHAT, PAYLOAD)
+    with pytest.raises(CircuitOpenError):
+        client.post_json(CHAT, PAYLOAD)
+    assert attempts(config) == 3
@@ -0,0 +1,30 @@
+# tests/test_packing.py
+"""Class skeletons elide the method bodies ast points at."""
+import pytest
+
+from src.packing import class_skeleton
+
+@pytest.mark.parametrize("sep", ["", "\x0c", "\u2028"])
+def test_skeleton_elides_method_bodies(sep):
+    code = (
+        "class Paddle:\n"
+        f"    # section{sep}break\n"
+        "    speed = 3\n"
+        "\n"
+        "    def move(self, dy):\n"
+        "        self.y += dy\n"
+        "        return self.y\n"
+        "\n"
+        "    def reset(self): self.y = 0"
+    )
+
+    assert class_skeleton(code) == (
+        "class Paddle:\n"
+        f"    # section{sep}break\n"
+        "    speed = 3\n"
+        "\n"
+        "    def move(self, dy):\n"
+        "        ...\n"
+        "\n"
+        "    def reset(self): self.y = 0"
+    )
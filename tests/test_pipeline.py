@@ -0,0 +1,89 @@
+# tests/test_pipeline.py
+"""A file is only recorded as ingested once every one of its chunks made it through."""
+import pytest
+
+from fake_model_server import FakeModelConfig, start_fake_server
+from src import ai_engine
+from src.manifest import IngestManifest
+from src.pipeline import IngestPipeline
+from src.vector_store import VectorStore
+
+SOURCE = "def main():\n    return 1\n"
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    config = FakeModelConfig()
+    server, base_url = start_fake_server(config)
+    monkeypatch.setattr(ai_engine, "API_BASE_URL", base_url)
+    monkeypatch.setattr(ai_engine, "CACHE_ENABLED", False)
+    monkeypatch.setattr(ai_engine, "_client", None)
+    yield config
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "repo"
+    path.mkdir()
+    (path / "a.py").write_text(SOURCE)
+    return path
+
+def ingest(repo, tmp_path, store=None) -> dict:
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), str(repo))
+    events = list(IngestPipeline(str(repo), store=store, manifest=manifest).run())
+    assert events[-1]["status"] == "complete"
+    return events[-1]
+
+def recorded(repo, tmp_path) -> bool:
+    return "a.py" in IngestManifest(str(tmp_path / "manifest.json"), str(repo)).files
+
+def test_failed_summary_is_retried_by_next_ingest(fake_server, repo, tmp_path):
+    fake_server.fail_next = [400]
+
+    result = ingest(repo, tmp_path)
+    assert result["files_incomplete"] == 1
+    assert not recorded(repo, tmp_path)
+    assert (repo / "a.py").read_text() == SOURCE
+
+    result = ingest(repo, tmp_path)
+    assert result["files_reprocessed"] == 1
+    assert result["files_incomplete"] == 0
+    assert recorded(repo, tmp_path)
+    assert '"""' in (repo / "a.py").read_text()
+
+def test_failed_embedding_is_retried_by_next_ingest(fake_server, repo, tmp_path):
+    fake_server.fail_next_embeddings = [400]
+    store = VectorStore(str(tmp_path / "db"), backend="memmap").repo("test")
+
+    result = ingest(repo, tmp_path, store)
+    assert result["chunks_indexed"] == 0
+    assert result["files_incomplete"] == 1
+    assert not recorded(repo, tmp_path)
+    assert store.collection.count() == 0
+
+    result = ingest(repo, tmp_path, store)
+    assert result["files_reprocessed"] == 1
+    assert result["chunks_indexed"] == 1
+    assert recorded(repo, tmp_path)
+    assert store.collection.count() == 1
+
+def test_failed_summary_is_not_indexed(fake_server, repo, tmp_path):
+    fake_server.fail_next = [400]
+    store = VectorStore(str(tmp_path / "db"), backend="memmap").repo("test")
+
+    result = ingest(repo, tmp_path, store)
+    assert result["files_incomplete"] == 1
+    # The placeholder was neither embedded nor upserted
+    assert fake_server.requests["embeddings"] == 0
+    assert store.collection.count() == 0
+    assert (repo / "a.py").read_text() == SOURCE
+
+def test_cli_does_not_summarize_languages_it_cannot_write(fake_server, tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.js").write_text("function hello() {\n    return 1;\n}\n")
+
+    result = ingest(repo, tmp_path)
+    assert result["files_reprocessed"] == 1
+    assert fake_server.requests["chat"] == 0
+    assert "app.js" in IngestManifest(str(tmp_path / "manifest.json"), str(repo)).files
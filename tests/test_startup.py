@@ -0,0 +1,28 @@
+# tests/test_startup.py
+"""
+Cold-start budgets of the server and the CLI, from benchmarks/bench_startup.py.
+Set STARTUP_BUDGET_SCALE (e.g. 2) to stretch every budget on slow CI machines.
+"""
+import os
+
+import pytest
+
+from bench_startup import TARGETS, check
+from synthetic_repo import generate_repo
+
+SCALE = float(os.environ.get("STARTUP_BUDGET_SCALE", "1.0"))
+RUNS = 3
+
+@pytest.fixture(scope="module")
+def workdir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("startup")
+    generate_repo(str(path / "repo"), files=20, defs_per_file=10)
+    return str(path)
+
+@pytest.mark.parametrize("target", list(TARGETS))
+def test_startup_budget(workdir, target):
+    _, _, forbidden = TARGETS[target]
+    result = check(target, RUNS, SCALE, workdir)
+
+    assert not [module for module in forbidden if module in result["heavy_modules"]], result["problems"]
+    assert result["median_ms"] <= result["budget_ms"], result["problems"]
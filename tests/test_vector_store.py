@@ -0,0 +1,69 @@
+# tests/test_vector_store.py
+"""Searches across every repository namespace of a VectorStore, and read-only readers of one."""
+import os
+
+from src.chunker import chunk_file
+from src.ingest import load_file
+from src.vector_store import VectorStore, build_embed_text
+
+FILES = {
+    "a": ("game.py", "class Ball:\n    def move(self):\n        return 1\n"),
+    "b": ("app.js", "function hello() {\n    return 1;\n}\n\nclass Foo {\n    bar() {\n        return 2;\n    }\n}\n")
+}
+
+def index(store: VectorStore, tmp_path, repo: str, name: str, source: str):
+    path = tmp_path / repo / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(source)
+    chunks = chunk_file(load_file(str(path), name))
+    for chunk in chunks:
+        chunk.summary = f"Summary of {chunk.chunk_id}."
+    embed_texts = [build_embed_text(chunk) for chunk in chunks]
+    store.repo(repo).upsert_chunks(chunks, embed_texts, [[1.0, float(i)] for i in range(len(chunks))])
+    store.repo(repo).flush()
+
+def make_store(tmp_path) -> VectorStore:
+    store = VectorStore(str(tmp_path / "db"), backend="memmap")
+    for repo, (name, source) in FILES.items():
+        index(store, tmp_path, repo, name, source)
+    return store
+
+def test_symbol_match_in_one_repo_answers_search_over_all(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    embedded = []
+    monkeypatch.setattr(store, "_embed_query", lambda query: embedded.append(query) or [1.0, 0.0])
+
+    results = store.search("Ball.move", n_results=3)
+
+    assert results["ids"] == [["a:game.py:Ball.move"]]
+    assert embedded == []
+
+def test_other_queries_search_every_repo(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    monkeypatch.setattr(store, "_embed_query", lambda query: [1.0, 0.0])
+
+    repos = {metadata["repo"] for metadata in store.search("return", n_results=10)["metadatas"][0]}
+
+    assert repos == {"a", "b"}
+
+def test_read_only_reader_sees_symbols_added_later(tmp_path, monkeypatch):
+    writer = make_store(tmp_path)
+    reader = VectorStore(str(tmp_path / "db"), backend="memmap", read_only=True)
+    monkeypatch.setattr(reader, "_embed_query", lambda query: [1.0, 0.0])
+    # Loads the reader's lexical index before the writer adds anything
+    assert reader.search("Ball.move", n_results=3, repo="a")["ids"] == [["a:game.py:Ball.move"]]
+
+    index(writer, tmp_path, "a", "paddle.py", "class Paddle:\n    def draw(self):\n        return 2\n")
+
+    assert reader.search("Paddle.draw", n_results=3, repo="a")["ids"] == [["a:paddle.py:Paddle.draw"]]
+
+def test_read_only_reader_never_writes_the_lexical_index(tmp_path):
+    make_store(tmp_path)
+    lexical_path = tmp_path / "db" / "lexical" / "a.json"
+    os.remove(lexical_path)
+
+    reader = VectorStore(str(tmp_path / "db"), backend="memmap", read_only=True)
+    # Rebuilt in memory from the collection, but not saved
+    assert reader.repo("a").lexical.lookup_symbol("Ball.move") == ["a:game.py:Ball.move"]
+    reader.repo("a").flush()
+    assert not lexical_path.exists()
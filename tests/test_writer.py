@@ -0,0 +1,72 @@
+# tests/test_writer.py
+"""Docstring injection lands on the lines ast reports, whatever characters the file contains."""
+import ast
+
+import pytest
+
+from src.ai_engine import SUMMARY_FAILED
+from src.chunker import chunk_file
+from src.ingest import load_file
+from src.writer import inject_docstrings
+
+SOURCE = (
+    "# header{sep}comment\n"
+    "def helper(x):\n"
+    "    return x + 1\n"
+    "\n"
+    "class Paddle:\n"
+    "    # section{sep}break\n"
+    "    def move(self, dy):\n"
+    "        self.y += dy\n"
+)
+
+def write_docs(tmp_path, source: str, newline: str = "\n") -> str:
+    path = tmp_path / "game.py"
+    path.write_bytes(source.replace("\n", newline).encode("utf-8"))
+
+    file = load_file(str(path), "game.py")
+    chunks = chunk_file(file)
+    for chunk in chunks:
+        chunk.summary = f"Summary of {chunk.chunk_id}."
+    assert inject_docstrings(str(path), chunks, expected_hash=file.file_hash) == len(chunks)
+    return path.read_bytes().decode("utf-8")
+
+def docstrings(content: str) -> dict:
+    tree = ast.parse(content)
+    return {
+        node.name: ast.get_docstring(node)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef))
+    }
+
+# Characters str.splitlines treats as line breaks but ast does not
+@pytest.mark.parametrize("sep", ["\x0c", "\x1c", "\x1e", "\x85", "\u2028", "\u2029"])
+def test_separators_inside_lines_do_not_shift_insertions(tmp_path, sep):
+    content = write_docs(tmp_path, SOURCE.format(sep=sep))
+
+    assert docstrings(content) == {
+        "helper": "Summary of helper.",
+        "Paddle": "Summary of Paddle.",
+        "move": "Summary of Paddle.move."
+    }
+    # Nothing ended up as a stray module-level string
+    assert all(not isinstance(node, ast.Expr) for node in ast.parse(content).body)
+    assert f"# header{sep}comment\n" in content
+
+def test_crlf_line_endings_are_kept(tmp_path):
+    content = write_docs(tmp_path, SOURCE.format(sep="\x0c"), newline="\r\n")
+
+    assert docstrings(content)["move"] == "Summary of Paddle.move."
+    assert "\n" not in content.replace("\r\n", "")
+
+def test_failed_summaries_are_not_written(tmp_path):
+    path = tmp_path / "game.py"
+    path.write_text(SOURCE.format(sep=" "))
+
+    file = load_file(str(path), "game.py")
+    chunks = chunk_file(file)
+    for chunk in chunks:
+        chunk.summary = SUMMARY_FAILED if chunk.chunk_id == "helper" else f"Summary of {chunk.chunk_id}."
+    assert inject_docstrings(str(path), chunks, expected_hash=file.file_hash) == len(chunks) - 1
+
+    assert docstrings(path.read_text())["helper"] is None